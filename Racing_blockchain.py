@@ -1,70 +1,55 @@
-import tkinter as tk
-import hashlib
-import time
-import secrets
-from tkinter import messagebox
-from PIL import Image, ImageTk
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from asset_cache import Atlas
+from chain_prune import PrunedChain
+from chain_export import export_chain
+from chain_viewer import ChainViewer
+from hash_rng import SYSTEM, GameSeed
+
+# GUI modules load on first use, so HorseRace can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
 
 # Phương pháp chính trong blockchain là: Hash-based RNG kết hợp với Proof of Work (PoW).
 
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
-
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
-
 class HorseRace:
-    def __init__(self):
+    def __init__(self, rng=SYSTEM):
+        # rng: a hash_rng.HashRNG for races that can be reproduced from the chain
         self.reels = [str(i) for i in range(1, 21)]
+        self.rng = rng
 
     def spin(self):
-        return [int(secrets.choice(self.reels)) for _ in range(3)]
+        return [int(step) for step in self.rng.choices(self.reels, 3)]
+
+def race_state(block):
+    # Positions after the last step recorded in a block (batched or single record)
+    data = block.data
+    records = data["Events"] if isinstance(data, dict) and "Merkle Root" in data else [data]
+    for record in reversed(records):
+        if isinstance(record, dict) and "Player Positions" in record:
+            return {"Player Positions": record["Player Positions"]}
+    return None
 
 class HorseRaceGUI:
     def __init__(self, root):
-        self.horse_race = HorseRace()
-        self.blockchain = Blockchain()
+        # Keep only the latest blocks in memory, with snapshots of the race positions as of the
+        # snapshot's block (the GUI runs ahead of the mined tip)
+        self.blockchain = Blockchain(cache=ProofCache(), store=PrunedChain(
+            keep_blocks=500, snapshot_every=50, state=race_state))
+        # Steps come from a HashRNG tied to the chain, so replay.py can re-make them
+        self.seed = GameSeed(self.blockchain, "Horse Race")
+        self.horse_race = HorseRace(self.seed.rng)
         self.player_positions = [0, 0, 0]  # Positions of player 1, 2, 3
         self.steps_to_win = 200  # Set the goal to 200 steps to win
         self.auto_sprint = False  # Flag to control auto sprint
 
         # Set up the main window
         self.root = root
+        # A race records a step every 100 ms, so steps are batched into Merkle blocks
+        self.block_worker = BlockWorker(self.blockchain, self.root, batch_size=20, batch_timeout=1.0)
+        self.block_worker.submit(self.seed.commitment(), callback=self.seed.on_sealed)
         self.root.title("Blockchain Horse Race")
         self.root.geometry("1200x500")  # Width x Height
         self.root.eval('tk::PlaceWindow . center')  # Center the window
@@ -82,12 +67,8 @@ class HorseRaceGUI:
         # Create finish line on the canvas
         self.track_canvas.create_line(self.finish_line_position + 50, 0, self.finish_line_position + 50, 250, fill="black", width=8)
 
-        # Create icons for each player
-        self.player_icons = {
-            1: ImageTk.PhotoImage(Image.open("img/player1.png").resize((50, 50))),
-            2: ImageTk.PhotoImage(Image.open("img/player2.png").resize((50, 50))),
-            3: ImageTk.PhotoImage(Image.open("img/player3.png").resize((50, 50))),
-        }
+        # Create icons for each player (from a pre-rendered atlas, see asset_cache.py)
+        self.player_icons = Atlas("players", {i: f"img/player{i}.png" for i in (1, 2, 3)}, (50, 50))
 
         # Create icons for each player on the track
         self.player1_icon = self.track_canvas.create_image(0, 50, anchor=tk.NW, image=self.player_icons[1])
@@ -125,6 +106,7 @@ class HorseRaceGUI:
             return
 
         # Simulate the race step for 3 players
+        reseed = self.seed.begin_round()
         spin_result = self.horse_race.spin()
 
         # Update player positions based on spin result
@@ -150,26 +132,30 @@ class HorseRaceGUI:
                 self.quit_game()
                 return
 
-        # Record outcome on blockchain
-        last_proof = self.blockchain.get_last_block().proof
-        proof = self.blockchain.proof_of_work(last_proof)
+        # Record outcome on blockchain (mined in the background)
         data = {
             "Spin Result": spin_result,
             "Player Positions": self.player_positions.copy(),
+            **reseed,
         }
-        self.blockchain.add_block(data, proof)
+        self.block_worker.submit(data, callback=self.seed.on_sealed)
 
         # Schedule the next sprint after 0.1 second
         self.root.after(100, self.spin_race)
 
     def quit_game(self):
-        # Display blockchain information
-        blockchain_info = "\nBlockchain:\n"
-        for block in self.blockchain.chain:
-            blockchain_info += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
-        
-        messagebox.showinfo("Blockchain", blockchain_info)
-        self.root.quit()
+        # Stop the sprint loop first: the viewer keeps the main loop running after the worker closes
+        self.auto_sprint = False
+        self.sprint_button.config(state=tk.DISABLED)
+
+        # Reveal the seed, then wait for queued records to be mined before showing the chain
+        if not self.block_worker.closed:
+            self.block_worker.submit(self.seed.reveal())
+        self.block_worker.close()
+
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits)
+        export_chain(self.blockchain.chain, "race_blockchain.jsonl")
+        ChainViewer(self.root, self.blockchain.chain, on_close=self.root.quit)
 
 def main():
     root = tk.Tk()
@@ -1,77 +1,48 @@
-import tkinter as tk
-import hashlib
-import time
-import secrets
-from tkinter import messagebox
-
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
-
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from chain_export import export_chain
+from chain_viewer import ChainViewer
+from hash_rng import SYSTEM, GameSeed
+
+# GUI modules load on first use, so RussianRoulette can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
 
 class RussianRoulette:
-    def __init__(self):
+    def __init__(self, rng=SYSTEM):
+        # rng: a hash_rng.HashRNG for shots that can be reproduced from the chain
+        self.rng = rng
         self.gun1_chambers = [0] * 6  # Empty chambers for Gun 1
         self.gun2_chambers = [0] * 6  # Empty chambers for Gun 2
         self.place_bullets()
 
     def place_bullets(self):
         # Randomly place a bullet in one chamber of each gun
-        bullet_position1 = secrets.randbelow(6)
-        bullet_position2 = secrets.randbelow(6)
+        bullet_position1 = self.rng.randbelow(6)
+        bullet_position2 = self.rng.randbelow(6)
         self.gun1_chambers[bullet_position1] = 1
         self.gun2_chambers[bullet_position2] = 1
 
     def pull_trigger(self, gun):
         # Randomly choose a chamber to "fire"
-        chamber = secrets.randbelow(6)
+        chamber = self.rng.randbelow(6)
         bullet_fired = gun[chamber] == 1
         return chamber, bullet_fired
 
 class RussianRouletteGUI:
     def __init__(self, root):
-        self.roulette = RussianRoulette()
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(cache=ProofCache())
+        # Shots come from a HashRNG tied to the chain, so replay.py can re-make them
+        self.seed = GameSeed(self.blockchain, "Russian Roulette")
+        self.roulette = RussianRoulette(self.seed.rng)
         self.lives = {"Player 1": 1, "Player 2": 1}  # Each player starts with 1 life
 
         # Set up the main window
         self.root = root
+        self.block_worker = BlockWorker(self.blockchain, self.root)
+        self.block_worker.submit(self.seed.commitment(), callback=self.seed.on_sealed)
         self.root.title("Blockchain Russian Roulette")
 
         # Create game labels and buttons
@@ -97,6 +68,8 @@ class RussianRouletteGUI:
         self.quit_button.pack(pady=20)
 
     def fire_both_guns(self):
+        reseed = self.seed.begin_round()
+
         # Fire gun 1 for Player 1
         chamber1, bullet_fired1 = self.roulette.pull_trigger(self.roulette.gun1_chambers)
         outcome1 = "Survived" if not bullet_fired1 else "Lost"
@@ -105,12 +78,10 @@ class RussianRouletteGUI:
         chamber2, bullet_fired2 = self.roulette.pull_trigger(self.roulette.gun2_chambers)
         outcome2 = "Survived" if not bullet_fired2 else "Lost"
 
-        # Increment block index for each click
-        block_index = len(self.blockchain.chain)
+        # Increment block index for each click (counting blocks still being mined)
+        block_index = self.block_worker.next_index
 
         # Update blockchain for Player 1
-        last_proof = self.blockchain.get_last_block().proof
-        proof = self.blockchain.proof_of_work(last_proof)
         data1 = {
             "Block Index": block_index,
             "Player": "Player 1",
@@ -119,6 +90,7 @@ class RussianRouletteGUI:
             "Bullet Location": self.roulette.gun1_chambers,
             "Outcome": outcome1,
             "Lives Before Spin": self.lives["Player 1"],
+            **reseed,
         }
 
         # Update blockchain for Player 2
@@ -137,7 +109,7 @@ class RussianRouletteGUI:
             self.lives["Player 1"] -= 1  # Player 1 loses a life
             data1["Lives After Spin"] = self.lives["Player 1"]
             self.result_label_player1.config(text=f"Player 1 LOST! Bullet was in chamber {chamber1}.")
-            self.blockchain.add_block(data1, proof)
+            self.block_worker.submit(data1, callback=self.seed.on_sealed)
 
             # Check if Player 1 has no lives left
             if self.lives["Player 1"] <= 0:
@@ -146,13 +118,13 @@ class RussianRouletteGUI:
                 return
         else:
             self.result_label_player1.config(text=f"Player 1 survived! No bullet in chamber {chamber1}.")
-            self.blockchain.add_block(data1, proof)
+            self.block_worker.submit(data1, callback=self.seed.on_sealed)
 
         if outcome2 == "Lost":
             self.lives["Player 2"] -= 1  # Player 2 loses a life
             data2["Lives After Spin"] = self.lives["Player 2"]
             self.result_label_player2.config(text=f"Player 2 LOST! Bullet was in chamber {chamber2}.")
-            self.blockchain.add_block(data2, proof)
+            self.block_worker.submit(data2, callback=self.seed.on_sealed)
 
             # Check if Player 2 has no lives left
             if self.lives["Player 2"] <= 0:
@@ -161,19 +133,20 @@ class RussianRouletteGUI:
                 return
         else:
             self.result_label_player2.config(text=f"Player 2 survived! No bullet in chamber {chamber2}.")
-            self.blockchain.add_block(data2, proof)
+            self.block_worker.submit(data2, callback=self.seed.on_sealed)
 
         # Update lives label
         self.lives_label.config(text=f"Player 1 Lives: {self.lives['Player 1']} | Player 2 Lives: {self.lives['Player 2']}")
 
     def quit_game(self):
-        # Display blockchain information
-        blockchain_info = "\nBlockchain:\n"
-        for block in self.blockchain.chain:
-            blockchain_info += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
-        
-        messagebox.showinfo("Blockchain", blockchain_info)
-        self.root.quit()
+        # Reveal the seed, then wait for queued records to be mined before showing the chain
+        if not self.block_worker.closed:
+            self.block_worker.submit(self.seed.reveal())
+        self.block_worker.close()
+
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits)
+        export_chain(self.blockchain.chain, "roulette_blockchain.jsonl")
+        ChainViewer(self.root, self.blockchain.chain, on_close=self.root.quit)
 
 def main():
     root = tk.Tk()
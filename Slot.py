@@ -1,106 +1,162 @@
-import tkinter as tk
-import hashlib
 import time
-import secrets
-from tkinter import messagebox
-from PIL import Image, ImageTk  # Importing PIL for image handling
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from asset_cache import Atlas
+from merkle import batch_data
+from chain_export import export_chain
+from chain_viewer import ChainViewer
+from hash_rng import SYSTEM, GameSeed
+import metrics
+
+# GUI modules load on first use, so SlotMachine can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
+np = lazy_import("numpy")  # Only for evaluate_batch on NumPy arrays
+
+AUTOPLAY_SPINS = 1000  # Default number of spins for autoplay
+FRAME_MS = 33  # Autoplay redraws the reels at most this often (about 30 frames a second)
+AUTOPLAY_FRAMES = 30  # Frames an autoplay run is shown in, however many spins it has
 
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
+class SlotMachine:
+    # Reels run on integer symbol IDs (indexes into REELS). Payouts come from a 14x14x14 lookup
+    # table built once from rules(), indexed by a * 196 + b * 14 + c; symbol names are only
+    # produced for display and for the chain record.
+    REELS = ["Cherry", "Lemon", "Orange", "Plum", "Grape", "Coin", "Gold", "Heart", "Spade", "Diamond", "Club", "Bell", "Bar", "7"]
+    SEVEN = REELS.index("7")
+    table = None  # (outcome, amount) per flat index, shared by every machine
+
+    def __init__(self, rng=SYSTEM, weights=None):
+        # rng: a hash_rng.HashRNG for outcomes that can be reproduced from the chain
+        # weights: optional integer weight per symbol (same on every reel), e.g. fewer 7s
+        self.reels = self.REELS
+        self.ids = {symbol: i for i, symbol in enumerate(self.REELS)}
+        self.rng = rng
+        self.set_weights(weights)
+        if SlotMachine.table is None:
+            SlotMachine.table = self.build_table()
+        self.amounts = [amount for _, amount in self.table]
+
+    def set_weights(self, weights):
+        # The reel strip lists each symbol ID `weight` times; spins draw uniformly from it
+        if weights is None:
+            weights = [1] * len(self.REELS)
+        if len(weights) != len(self.REELS) or any(weight < 0 for weight in weights) or not sum(weights):
+            raise ValueError(f"need {len(self.REELS)} non-negative weights")
+        self.weights = list(weights)
+        self.strip = bytes(i for i, weight in enumerate(weights) for _ in range(weight))
+        self.strip_table = self.strip[:256].ljust(256, b"\0")  # Strip position -> symbol ID
+        self.amount_array = None
+
+    @classmethod
+    def rules(cls, a, b, c):
+        if a == b == c == cls.SEVEN:
+            return "Win", 500  # Triple match 7 gives 500 units
+        elif a == b == c:
+            return "Win", 100  # Triple match gives 100 units
+        elif a == b or b == c:
+            return "Win", 10  # Two matches give 10 units
+        else:
+            return "Loss", -5  # No match results in losing 10 units
 
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
+    @classmethod
+    def build_table(cls):
+        n = len(cls.REELS)
+        return [cls.rules(a, b, c) for a in range(n) for b in range(n) for c in range(n)]
 
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
+    def spin_ids(self, count=1):
+        # 3 * count symbol IDs (reel 1, 2, 3 of each spin) drawn in bulk from the reel strip
+        draws = self.rng.indexes(len(self.strip), 3 * count)
+        if len(self.strip) <= 256:
+            return bytes(draws).translate(self.strip_table)
+        return bytes(self.strip[i] for i in draws)
 
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+    def symbols(self, ids):
+        return [self.REELS[i] for i in ids]
 
+    def spin(self):
+        return self.symbols(self.spin_ids())
 
-class SlotMachine:
-    def __init__(self):
-        self.reels = ["Cherry", "Lemon", "Orange", "Plum", "Grape", "Coin", "Gold", "Heart", "Spade", "Diamond", "Club", "Bell", "Bar", "7"]
+    def spins(self, count):
+        # count spins drawn in bulk
+        symbols = self.symbols(self.spin_ids(count))
+        return [symbols[i:i + 3] for i in range(0, 3 * count, 3)]
 
-    def spin(self):
-        return [secrets.choice(self.reels) for _ in range(3)]
+    def evaluate_ids(self, ids):
+        return self.table[ids[0] * 196 + ids[1] * 14 + ids[2]]
 
     def evaluate_spin(self, spin_result):
-        if spin_result[0] == spin_result[1] == spin_result[2] == "7":
-            return "Win", 500  # Triple match 7 gives 500 units
-        elif spin_result[0] == spin_result[1] == spin_result[2]:
-            return "Win", 100  # Triple match gives 100 units
-        elif spin_result[0] == spin_result[1] or spin_result[1] == spin_result[2]:
-            return "Win", 10  # Two matches give 10 units
-        else:
-            return "Loss", -5  # No match results in losing 10 units
+        ids = self.ids
+        return self.table[ids[spin_result[0]] * 196 + ids[spin_result[1]] * 14 + ids[spin_result[2]]]
+
+    def evaluate_batch(self, ids):
+        # Amounts for many spins in one call. ids: a flat sequence of 3 * n symbol IDs (bytes from
+        # spin_ids, array, list), or an (n, 3) NumPy integer array, which returns a NumPy array
+        if hasattr(ids, "ndim"):
+            if self.amount_array is None:
+                self.amount_array = np.array(self.amounts, dtype=np.int64)
+            flat = ids[:, 0].astype(np.intp) * 196 + ids[:, 1] * 14 + ids[:, 2]
+            return self.amount_array[flat]
+        amounts = self.amounts
+        symbols = iter(ids)
+        return [amounts[a * 196 + b * 14 + c] for a, b, c in zip(symbols, symbols, symbols)]
+
+    def autoplay(self, count, balance, stop_loss=None, stop_win=None):
+        # Up to `count` spins in one loop, stopping once the balance reaches zero, falls stop_loss
+        # units below where it started or rises stop_win above it.
+        # Returns (records, reason): one record per spin, as a single spin records it.
+        ids = self.spin_ids(count)
+        table = self.table
+        reels = self.REELS
+        floor = max(0, balance - stop_loss) if stop_loss is not None else 0
+        ceiling = balance + stop_win if stop_win is not None else None
+        records = []
+        reason = "Done"
+        for i in range(0, 3 * count, 3):
+            a, b, c = ids[i], ids[i + 1], ids[i + 2]
+            outcome, amount = table[a * 196 + b * 14 + c]
+            balance += amount
+            records.append({
+                "Spin Result": [reels[a], reels[b], reels[c]],
+                "Outcome": outcome,
+                "Amount": amount,
+                "Balance After Spin": balance,
+            })
+            if balance <= floor:
+                reason = "Stop-loss" if balance > 0 else "Balance zero"
+                break
+            if ceiling is not None and balance >= ceiling:
+                reason = "Stop-win"
+                break
+        return records, reason
 
 
 class SlotMachineGUI:
     def __init__(self, root):
-        self.slot_machine = SlotMachine()
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(cache=ProofCache())
+        # Spins come from a HashRNG tied to the chain, so replay.py can re-make them
+        self.seed = GameSeed(self.blockchain, "Slot Machine")
+        self.slot_machine = SlotMachine(self.seed.rng)
         self.balance = 100
+        self.autoplaying = False
 
         # Set up the main window
         self.root = root
+        self.block_worker = BlockWorker(self.blockchain, self.root)
+        self.block_worker.submit(self.seed.commitment(), callback=self.seed.on_sealed)
         self.root.title("Blockchain Slot Machine")
 
         # Set a larger window size
-        self.root.geometry("600x400")  # Width x Height
+        self.root.geometry("600x480")  # Width x Height
 
         # Configure grid to center elements
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
         self.root.grid_columnconfigure(2, weight=1)
 
-        # Load images for the slot machine reels using Pillow
-        self.images = {
-            "Cherry": ImageTk.PhotoImage(Image.open("img/cherry.png").resize((64, 64))),
-            "Lemon": ImageTk.PhotoImage(Image.open("img/lemon.png").resize((64, 64))),
-            "Orange": ImageTk.PhotoImage(Image.open("img/orange.png").resize((64, 64))),
-            "Plum": ImageTk.PhotoImage(Image.open("img/plum.png").resize((64, 64))),
-            "Grape": ImageTk.PhotoImage(Image.open("img/grape.png").resize((64, 64))),
-            "Coin": ImageTk.PhotoImage(Image.open("img/coin.png").resize((64, 64))),
-            "Gold": ImageTk.PhotoImage(Image.open("img/gold.png").resize((64, 64))),
-            "Heart": ImageTk.PhotoImage(Image.open("img/heart.png").resize((64, 64))),
-            "Spade": ImageTk.PhotoImage(Image.open("img/spade.png").resize((64, 64))),
-            "Diamond": ImageTk.PhotoImage(Image.open("img/diamond.png").resize((64, 64))),
-            "Club": ImageTk.PhotoImage(Image.open("img/club.png").resize((64, 64))),
-            "Bell": ImageTk.PhotoImage(Image.open("img/bell.png").resize((64, 64))),
-            "Bar": ImageTk.PhotoImage(Image.open("img/bar.png").resize((64, 64))),
-            "7": ImageTk.PhotoImage(Image.open("img/7.png").resize((64, 64))),
-            }
+        # Reel images, cut on first display from a pre-rendered atlas (see asset_cache.py)
+        self.images = Atlas("slot", {symbol: f"img/{symbol.lower()}.png" for symbol in SlotMachine.REELS}, (64, 64))
 
         # Image labels for the reels
         self.reel_1_label = tk.Label(self.root)
@@ -116,58 +172,149 @@ class SlotMachineGUI:
         self.spin_button = tk.Button(self.root, text="Spin", command=self.spin_slot_machine, font=("Helvetica", 20))
         self.spin_button.grid(row=1, column=0, columnspan=3, pady=20)
 
+        # Autoplay: number of spins, optional stop-loss and stop-win (units), and its button
+        self.autoplay_frame = tk.Frame(self.root)
+        self.autoplay_frame.grid(row=2, column=0, columnspan=3)
+        self.spins_entry = self.add_entry("Spins", str(AUTOPLAY_SPINS))
+        self.stop_loss_entry = self.add_entry("Stop-loss", "")
+        self.stop_win_entry = self.add_entry("Stop-win", "")
+        self.autoplay_button = tk.Button(self.autoplay_frame, text="Autoplay", command=self.autoplay)
+        self.autoplay_button.pack(side=tk.LEFT, padx=10)
+
         # Labels for displaying results
         self.result_label = tk.Label(self.root, text="", font=("Helvetica", 20))
-        self.result_label.grid(row=2, column=0, columnspan=3)
+        self.result_label.grid(row=3, column=0, columnspan=3)
 
         self.balance_label = tk.Label(self.root, text=f"Balance: {self.balance} units", font=("Helvetica", 20))
-        self.balance_label.grid(row=3, column=0, columnspan=3)
+        self.balance_label.grid(row=4, column=0, columnspan=3)
 
         # Quit button
         self.quit_button = tk.Button(self.root, text="Quit", command=self.quit_game, font=("Helvetica", 20))
-        self.quit_button.grid(row=4, column=0, columnspan=3, pady=20)
+        self.quit_button.grid(row=5, column=0, columnspan=3, pady=20)
+
+    def add_entry(self, label, value):
+        tk.Label(self.autoplay_frame, text=label).pack(side=tk.LEFT)
+        entry = tk.Entry(self.autoplay_frame, width=6)
+        entry.insert(0, value)
+        entry.pack(side=tk.LEFT, padx=(2, 8))
+        return entry
 
     def spin_slot_machine(self):
-        # Spin the slot machine
-        spin_result = self.slot_machine.spin()
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter_ns()
+
+        # Spin the slot machine (symbol IDs; names are only needed for the images and the record)
+        reseed = self.seed.begin_round()
+        ids = self.slot_machine.spin_ids()
+        if timing:
+            metrics.observe("rng", start)
+            start = time.perf_counter_ns()
+
+        # Evaluate the result
+        outcome, amount = self.slot_machine.evaluate_ids(ids)
+        spin_result = self.slot_machine.symbols(ids)
+        self.balance += amount
+        if timing:
+            metrics.observe("evaluate", start)
+            start = time.perf_counter_ns()
 
         # Update reel image labels
         self.reel_1_label.config(image=self.images[spin_result[0]])
         self.reel_2_label.config(image=self.images[spin_result[1]])
         self.reel_3_label.config(image=self.images[spin_result[2]])
 
-        # Evaluate the result
-        outcome, amount = self.slot_machine.evaluate_spin(spin_result)
-        self.balance += amount
-
         # Update result and balance labels
         self.result_label.config(text=f"{outcome}! You {'won' if amount > 0 else 'lost'} {abs(amount)} units.")
         self.balance_label.config(text=f"Balance: {self.balance} units")
+        if timing:
+            metrics.observe("render", start)
 
-        # Record outcome on blockchain
-        last_proof = self.blockchain.get_last_block().proof
-        proof = self.blockchain.proof_of_work(last_proof)
+        # Record outcome on blockchain (mined in the background)
         data = {
             "Spin Result": spin_result,
             "Outcome": outcome,
             "Amount": amount,
             "Balance After Spin": self.balance,
+            **reseed,
         }
-        self.blockchain.add_block(data, proof)
+        self.block_worker.submit(data, callback=self.seed.on_sealed)
 
         # Check if balance is 0 or negative
         if self.balance <= 0:
             messagebox.showinfo("Game Over", "Your balance is zero. Game over!")
             self.quit_game()
 
+    def autoplay(self):
+        # Read the settings; a blank stop-loss or stop-win means no limit
+        try:
+            count = int(self.spins_entry.get())
+            stop_loss = int(self.stop_loss_entry.get()) if self.stop_loss_entry.get().strip() else None
+            stop_win = int(self.stop_win_entry.get()) if self.stop_win_entry.get().strip() else None
+            if count <= 0 or (stop_loss is not None and stop_loss <= 0) or (stop_win is not None and stop_win <= 0):
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Autoplay", "Spins, stop-loss and stop-win must be positive whole numbers.")
+            return
+
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter_ns()
+
+        # All spins are drawn and evaluated up front; the reels then only replay them on screen
+        start_balance = self.balance
+        reseed = self.seed.begin_round()
+        records, reason = self.slot_machine.autoplay(count, self.balance, stop_loss, stop_win)
+        self.balance = records[-1]["Balance After Spin"]
+        if timing:
+            metrics.observe("autoplay", start)
+
+        # The run drew `count` spins in one go even if it stopped early; replay needs both numbers
+        records[0].update(reseed, Autoplay=[count, len(records)])
+
+        # The whole run is one Merkle-batched block, so it costs a single proof of work
+        self.block_worker.submit(batch_data(records), callback=self.seed.on_sealed)
+
+        self.autoplaying = True
+        self.spin_button.config(state=tk.DISABLED)
+        self.autoplay_button.config(state=tk.DISABLED)
+        self.show_autoplay(records, reason, start_balance, 0)
+
+    def show_autoplay(self, records, reason, start_balance, shown):
+        # One frame: jump ahead so the run takes at most AUTOPLAY_FRAMES frames
+        if not self.autoplaying:
+            return
+        shown = min(len(records), shown + -(-len(records) // AUTOPLAY_FRAMES))
+        record = records[shown - 1]
+        spin_result = record["Spin Result"]
+        self.reel_1_label.config(image=self.images[spin_result[0]])
+        self.reel_2_label.config(image=self.images[spin_result[1]])
+        self.reel_3_label.config(image=self.images[spin_result[2]])
+        self.result_label.config(text=f"Autoplay: spin {shown} of {len(records)}")
+        self.balance_label.config(text=f"Balance: {record['Balance After Spin']} units")
+        if shown < len(records):
+            self.root.after(FRAME_MS, self.show_autoplay, records, reason, start_balance, shown)
+            return
+
+        self.autoplaying = False
+        self.spin_button.config(state=tk.NORMAL)
+        self.autoplay_button.config(state=tk.NORMAL)
+        self.result_label.config(text=f"{reason} after {len(records)} spins: {self.balance - start_balance:+} units.")
+        if self.balance <= 0:
+            messagebox.showinfo("Game Over", "Your balance is zero. Game over!")
+            self.quit_game()
+
     def quit_game(self):
-        # Display blockchain information
-        blockchain_info = "\nBlockchain:\n"
-        for block in self.blockchain.chain:
-            blockchain_info += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
-        
-        messagebox.showinfo("Blockchain", blockchain_info)
-        self.root.quit()
+        self.autoplaying = False
+
+        # Reveal the seed, then wait for queued records to be mined before showing the chain
+        if not self.block_worker.closed:
+            self.block_worker.submit(self.seed.reveal())
+        self.block_worker.close()
+
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits)
+        export_chain(self.blockchain.chain, "slot_blockchain.jsonl")
+        ChainViewer(self.root, self.blockchain.chain, on_close=self.root.quit)
 
 
 def main():
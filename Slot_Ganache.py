@@ -1,64 +1,35 @@
 
-import tkinter as tk
-import hashlib
-import time
 import secrets
-from tkinter import messagebox
-from PIL import Image, ImageTk
-from web3 import Web3
-
-# Ganache connection
-web3 = Web3(Web3.HTTPProvider("http://127.0.0.1:7545"))
-
-if web3.is_connected():
-    print("Connected to Ethereum blockchain via Ganache")
-else:
-    raise Exception("Failed to connect to Ganache")
-
-web3.eth.default_account = '0x5f4075d2D8e2597032a0A05F26D366e7edE924B5'
-
-
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
+import time
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from asset_cache import Atlas
+from chain_viewer import ChainViewer
+import metrics
+
+# GUI and web3 modules load on first use, so SlotMachine can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
+web3_module = lazy_import("web3")
+web3 = None
+
+
+def get_web3():
+    # Ganache connection, made the first time it is needed
+    global web3
+    if web3 is None:
+        connection = web3_module.Web3(web3_module.Web3.HTTPProvider("http://127.0.0.1:7545"))
+
+        if connection.is_connected():
+            print("Connected to Ethereum blockchain via Ganache")
+        else:
+            raise Exception("Failed to connect to Ganache")
 
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+        connection.eth.default_account = '0x5f4075d2D8e2597032a0A05F26D366e7edE924B5'
+        web3 = connection
+    return web3
 
 
 class SlotMachine:
@@ -87,8 +58,17 @@ class BlockchainSlotMachine:
         self.player_account = player_account
 
     def spin_slot_machine(self):
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter_ns()
         spin_result = self.slot_machine.spin()
+        if timing:
+            metrics.observe("rng", start)
+            start = time.perf_counter_ns()
         outcome, amount = self.slot_machine.evaluate_spin(spin_result)
+        if timing:
+            metrics.observe("evaluate", start)
+            start = time.perf_counter_ns()
 
         # If player wins, host sends ETH to player
         if amount > 0:
@@ -97,11 +77,13 @@ class BlockchainSlotMachine:
             txn = {
                 'from': self.host_account,
                 'to': self.player_account,
-                'value': web3.to_wei(amount / 1000, 'ether'),  # Host sends winnings to player
+                'value': get_web3().to_wei(amount / 1000, 'ether'),  # Host sends winnings to player
                 'gas': 2000000,
-                'gasPrice': web3.to_wei('50', 'gwei')
+                'gasPrice': get_web3().to_wei('50', 'gwei')
             }
-            tx_hash = web3.eth.send_transaction(txn)
+            tx_hash = get_web3().eth.send_transaction(txn)
+            if timing:
+                metrics.observe("transaction", start)
 
         # If player loses, player sends 0.01 ETH to the host
         else:
@@ -110,18 +92,20 @@ class BlockchainSlotMachine:
             txn = {
                 'from': self.player_account,
                 'to': self.host_account,
-                'value': web3.to_wei(0.01, 'ether'),  # Correct method for converting to Wei
+                'value': get_web3().to_wei(0.01, 'ether'),  # Correct method for converting to Wei
                 'gas': 2000000,
-                'gasPrice': web3.to_wei('50', 'gwei')  # Correct method for converting gasPrice to Wei
+                'gasPrice': get_web3().to_wei('50', 'gwei')  # Correct method for converting gasPrice to Wei
             }
-            tx_hash = web3.eth.send_transaction(txn)
+            tx_hash = get_web3().eth.send_transaction(txn)
+            if timing:
+                metrics.observe("transaction", start)
 
         return spin_result, outcome, amount, tx_hash
 
 
 class SlotMachineGUI:
     def __init__(self, root):
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(cache=ProofCache())
 
         # Prompt player to enter their Ethereum account address
         self.account_prompt = tk.Toplevel(root)
@@ -150,8 +134,9 @@ class SlotMachineGUI:
         player_account = self.account_entry.get()
 
         # Validate if the Ethereum address is valid
-        if web3.is_address(player_account):
+        if get_web3().is_address(player_account):
             self.slot_machine = BlockchainSlotMachine(player_account)
+            self.block_worker = BlockWorker(self.blockchain, self.root)
             self.root.deiconify()  # Show the main window
             self.account_prompt.destroy()  # Close the prompt window
 
@@ -161,23 +146,8 @@ class SlotMachineGUI:
             messagebox.showerror("Invalid Address", "Please enter a valid Ethereum account address.")
 
     def setup_slot_machine_gui(self):
-        # Set up slot machine images (reel icons)
-        self.images = {
-            "Cherry": ImageTk.PhotoImage(Image.open("img/cherry.png").resize((64, 64))),
-            "Lemon": ImageTk.PhotoImage(Image.open("img/lemon.png").resize((64, 64))),
-            "Orange": ImageTk.PhotoImage(Image.open("img/orange.png").resize((64, 64))),
-            "Plum": ImageTk.PhotoImage(Image.open("img/plum.png").resize((64, 64))),
-            "Grape": ImageTk.PhotoImage(Image.open("img/grape.png").resize((64, 64))),
-            "Coin": ImageTk.PhotoImage(Image.open("img/coin.png").resize((64, 64))),
-            "Gold": ImageTk.PhotoImage(Image.open("img/gold.png").resize((64, 64))),
-            "Heart": ImageTk.PhotoImage(Image.open("img/heart.png").resize((64, 64))),
-            "Spade": ImageTk.PhotoImage(Image.open("img/spade.png").resize((64, 64))),
-            "Diamond": ImageTk.PhotoImage(Image.open("img/diamond.png").resize((64, 64))),
-            "Club": ImageTk.PhotoImage(Image.open("img/club.png").resize((64, 64))),
-            "Bell": ImageTk.PhotoImage(Image.open("img/bell.png").resize((64, 64))),
-            "Bar": ImageTk.PhotoImage(Image.open("img/bar.png").resize((64, 64))),
-            "7": ImageTk.PhotoImage(Image.open("img/7.png").resize((64, 64))),
-        }
+        # Set up slot machine images (reel icons), cut on first display from a pre-rendered atlas
+        self.images = Atlas("slot", {symbol: f"img/{symbol.lower()}.png" for symbol in self.slot_machine.reels}, (64, 64))
 
         # Image labels for the reels
         self.reel_1_label = tk.Label(self.root)
@@ -203,6 +173,9 @@ class SlotMachineGUI:
 
     def spin_slot_machine(self):
         spin_result, outcome, amount, tx_hash = self.slot_machine.spin_slot_machine()
+        timing = metrics.enabled
+        if timing:
+            start = time.perf_counter_ns()
 
         # Update reel image labels
         self.reel_1_label.config(image=self.images[spin_result[0]])
@@ -212,18 +185,19 @@ class SlotMachineGUI:
         # Update result and balance labels
         self.result_label.config(text=f"{outcome}! Transaction: {tx_hash.hex()}")
         self.balance_label.config(text=f"Balance: {self.slot_machine.balance} ETH")
+        if timing:
+            metrics.observe("render", start)
 
-        # Record the outcome and blockchain transaction details
-        last_proof = self.blockchain.get_last_block().proof
-        proof = self.blockchain.proof_of_work(last_proof)
+        # Record the outcome and blockchain transaction details (mined in the background)
         data = {
             "Spin Result": spin_result,
             "Outcome": outcome,
             "Amount": amount,
             "Transaction Hash": tx_hash.hex(),
+            "Player": self.slot_machine.player_account,
             "Balance After Spin": self.slot_machine.balance
         }
-        self.blockchain.add_block(data, proof)
+        self.block_worker.submit(data)
 
         # Check if balance falls below 0 and end the game
         if self.slot_machine.balance <= 0:
@@ -231,33 +205,15 @@ class SlotMachineGUI:
             self.quit_game()
 
     def quit_game(self):
-        # Display the blockchain record in a new window
-        blockchain_window = tk.Toplevel(self.root)
-        blockchain_window.title("Blockchain Records")
-        blockchain_window.geometry("600x400")
-
-        # Create a text widget to display the blockchain data
-        blockchain_text = tk.Text(blockchain_window, wrap=tk.WORD, font=("Helvetica", 10))
-        blockchain_text.pack(fill=tk.BOTH, expand=True)
-
-        # Loop through each block and append its data to the text widget
-        for block in self.blockchain.chain:
-            blockchain_text.insert(tk.END, f"Block {block.index}:\n")
-            blockchain_text.insert(tk.END, f"  Timestamp: {time.ctime(block.timestamp)}\n")
-            blockchain_text.insert(tk.END, f"  Data: {block.data}\n")
-            blockchain_text.insert(tk.END, f"  Proof: {block.proof}\n")
-            blockchain_text.insert(tk.END, f"  Hash: {block.hash}\n")
-            blockchain_text.insert(tk.END, "-"*50 + "\n")
-
-        # Add a quit button to close the blockchain window
-        close_button = tk.Button(blockchain_window, text="Close", command=blockchain_window.destroy, font=("Helvetica", 12))
-        close_button.pack(pady=10)
+        # Wait for queued records to be mined before showing the chain
+        self.block_worker.close()
 
-        # Quit the main game
-        self.root.quit()
+        # Browse the blockchain records in a paged viewer; closing it quits the game
+        ChainViewer(self.root, self.blockchain.chain, on_close=self.root.quit)
 
 
 if __name__ == "__main__":
+    get_web3()  # Fail fast if Ganache is not running
     root = tk.Tk()
     app = SlotMachineGUI(root)
     root.mainloop()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+from lazy_import import lazy_import
+
+# Pre-rendered GUI icons: every icon a GUI shows at one size is resized once into a single
+# PNG atlas under img/cache/, which Tk loads natively, so a warm start opens one file and
+# never imports PIL. Icons are cut out of the atlas the first time they are displayed.
+#
+# The atlas manifest keys each source image by its mtime and SHA-256. A source whose mtime
+# changed is re-hashed, and the atlas is only rebuilt (with PIL) when the content differs,
+# a source was added or removed, or the size changed.
+#
+#     self.images = Atlas("slot", {"Cherry": "img/cherry.png", ...}, (64, 64))
+#     label.config(image=self.images["Cherry"])
+
+tk = lazy_import("tkinter")
+Image = lazy_import("PIL.Image")  # Only needed to (re)build an atlas
+
+CACHE_DIR = os.path.join("img", "cache")
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class Atlas:
+    def __init__(self, name, sources, size, cache_dir=None):
+        # sources: key -> image path, in atlas order; size: (width, height) of every icon
+        self.sources = dict(sources)
+        self.size = tuple(size)
+        self.positions = {key: i for i, key in enumerate(self.sources)}
+        self.path = os.path.join(cache_dir or CACHE_DIR, f"{name}_{self.size[0]}x{self.size[1]}.png")
+        self.manifest_path = self.path[:-len(".png")] + ".json"
+        self.image = None  # The whole atlas as a Tk image, loaded on first use
+        self.icons = {}
+
+    def fresh(self):
+        # True when the atlas on disk matches the sources; refreshes mtimes of unchanged files
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        entries = manifest.get("sources", [])
+        if manifest.get("size") != list(self.size) or [entry[0] for entry in entries] != list(self.sources.values()):
+            return False
+        if not os.path.exists(self.path):
+            return False
+
+        touched = False
+        for entry in entries:
+            path, mtime_ns, digest = entry
+            current = os.stat(path).st_mtime_ns
+            if current == mtime_ns:
+                continue
+            if file_hash(path) != digest:
+                return False
+            entry[1] = current
+            touched = True
+        if touched:
+            self.write_manifest(entries)
+        return True
+
+    def build(self):
+        # Resize every source into one horizontal strip and record what it was built from
+        width, height = self.size
+        atlas = Image.new("RGBA", (width * len(self.sources), height))
+        entries = []
+        for i, path in enumerate(self.sources.values()):
+            with Image.open(path) as source:
+                atlas.paste(source.convert("RGBA").resize(self.size), (i * width, 0))
+            entries.append([path, os.stat(path).st_mtime_ns, file_hash(path)])
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        atlas.save(tmp_path, format="PNG")
+        os.replace(tmp_path, self.path)
+        self.write_manifest(entries)
+
+    def write_manifest(self, entries):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": list(self.size), "sources": entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def ensure(self):
+        # Path of an up-to-date atlas, building it first if needed
+        if not self.fresh():
+            self.build()
+        return self.path
+
+    def load(self):
+        if self.image is None:
+            self.image = tk.PhotoImage(file=self.ensure())
+        return self.image
+
+    def __getitem__(self, key):
+        icon = self.icons.get(key)
+        if icon is None:
+            atlas = self.load()
+            width, height = self.size
+            x = self.positions[key] * width
+            icon = tk.PhotoImage(width=width, height=height)
+            icon.tk.call(icon, "copy", atlas, "-from", x, 0, x + width, height)
+            self.icons[key] = icon
+        return icon
@@ -0,0 +1,431 @@
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from blockchain import Block, Blockchain, DIFFICULTY_BITS, search_nonces
+from chain_export import export_chain
+from hash_rng import HashRNG
+from mempool import Mempool
+from proof_cache import ProofCache
+from merkle import batch_data
+import metrics
+from Slot import AUTOPLAY_SPINS, SlotMachine
+from blackjack import BlackjackGame
+from Racing_blockchain import HorseRace
+from Russian_Roulette import RussianRoulette
+from egg import EggGame
+
+# Run with: python benchmarks.py [--only micro,games] [--output results.json] [--baseline baseline.json]
+#
+# Every benchmark reports its numbers through report(); they are written to --output as JSON
+# and, with --baseline, compared against a stored run. A result more than --tolerance worse
+# than the baseline is a regression and makes the run exit non-zero. Save a baseline on the
+# release machine with --output benchmark_baseline.json.
+
+RESULTS = {}
+OUTPUT = "benchmark_results.json"
+TOLERANCE = 0.15  # Fraction a result may fall behind the baseline before it counts as a regression
+
+
+def report(name, value, unit, higher_is_better=True):
+    RESULTS[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def measure(function, min_time=0.1, repeat=5):
+    # Calls per second: calibrate a round that takes min_time, then keep the best of `repeat`
+    # rounds so a busy machine does not show up as a regression
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return number / elapsed
+
+
+def legacy_proof_of_work(last_proof):
+    # The original string-based check, kept here as the baseline
+    proof = 0
+    while hashlib.sha256(f"{last_proof}{proof}".encode()).hexdigest()[:4] != "0000":
+        proof += 1
+    return proof
+
+
+def fast_proof_of_work(last_proof):
+    start = 0
+    while True:
+        proof = search_nonces(last_proof, start, start + 100000)
+        if proof is not None:
+            return proof
+        start += 100000
+
+
+def bench_proof_of_work(rounds=20):
+    # Mine the same chain of proofs with both checks and compare attempts per second
+    results = {}
+    for name, mine in (("legacy", legacy_proof_of_work), ("fast", fast_proof_of_work)):
+        last_proof = 100
+        attempts = 0
+        start = time.perf_counter()
+        for _ in range(rounds):
+            proof = mine(last_proof)
+            attempts += proof + 1
+            last_proof = proof
+        elapsed = time.perf_counter() - start
+        results[name] = (last_proof, attempts / elapsed)
+        report(f"proof_of_work.{name}", attempts / elapsed, "attempts/s")
+        print(f"proof_of_work [{name}]: {attempts} attempts in {elapsed:.3f}s ({attempts / elapsed:,.0f} attempts/s)")
+
+    assert results["legacy"][0] == results["fast"][0], "fast path disagrees with the legacy check"
+    print(f"speedup: {results['fast'][1] / results['legacy'][1]:.2f}x")
+
+
+class LegacyBlock:
+    # The original block layout (plain attributes, hex hash, float timestamp), kept as the baseline
+    def __init__(self, index, previous_hash, timestamp, data, proof):
+        self.index = index
+        self.previous_hash = previous_hash
+        self.timestamp = timestamp
+        self.data = data
+        self.proof = proof
+        self.hash = hashlib.sha256(f"{index}{previous_hash}{timestamp}{data}{proof}".encode()).hexdigest()
+
+
+def bench_block_memory(count=100000):
+    # Bytes per block for a chain of slot-machine records, including whatever the block keeps of its record
+    def record(i):
+        return {"Spin Result": ["7", "Bar", "7"], "Outcome": "Win", "Amount": 10, "Balance After Spin": i}
+
+    for name, make in (("legacy", lambda i, prev: LegacyBlock(i, prev, time.time(), record(i), 12345)),
+                       ("compact", lambda i, prev: Block(i, prev, None, record(i), 12345, timestamp_ns=time.time_ns()))):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        chain = []
+        previous_hash = "0"
+        for i in range(count):
+            block = make(i, previous_hash)
+            chain.append(block)
+            previous_hash = block.hash if name == "legacy" else block.raw_hash
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        report(f"block_memory.{name}", used / count, "bytes/block", higher_is_better=False)
+        print(f"block memory [{name}]: {used / count:.0f} bytes per block")
+        del chain
+
+
+def bench_rng(spins=300000):
+    # Slot reel draws: secrets.choice per symbol (the old spin) against HashRNG per call and in bulk
+    reels = SlotMachine().reels
+    rng = HashRNG(b"benchmark seed", b"\x00" * 32)
+    draws = 3 * spins
+    results = {}
+    for name, draw in (("secrets.choice", lambda: [secrets.choice(reels) for _ in range(draws)]),
+                       ("HashRNG.choice", lambda: [rng.choice(reels) for _ in range(draws)]),
+                       ("HashRNG.choices", lambda: rng.choices(reels, draws))):
+        start = time.perf_counter()
+        symbols = draw()
+        elapsed = time.perf_counter() - start
+        assert len(symbols) == draws
+        results[name] = draws / elapsed
+        report(f"rng.{name}", draws / elapsed, "draws/s")
+        print(f"rng [{name}]: {draws / elapsed:,.0f} draws/s")
+
+    # Same seed and block hash, same spins
+    assert SlotMachine(HashRNG(b"seed", b"hash")).spins(100) == SlotMachine(HashRNG(b"seed", b"hash")).spins(100)
+    print(f"speedup: {results['HashRNG.choices'] / results['secrets.choice']:.1f}x bulk, "
+          f"{results['HashRNG.choice'] / results['secrets.choice']:.1f}x per call")
+
+
+GAME_MODULES = ["Slot", "Slot_Ganache", "blackjack", "egg", "egg_eth", "Racing_blockchain", "Russian_Roulette"]
+HEAVY_MODULES = ["tkinter", "PIL", "web3", "multiprocessing"]
+IMPORT_BUDGET = 0.1  # seconds per game module, measured in a fresh interpreter
+
+
+def bench_import_time(budget=IMPORT_BUDGET):
+    # Headless import of every game module: time it and make sure no GUI / network module loads
+    over_budget = []
+    for module in GAME_MODULES:
+        code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+                f"elapsed = time.perf_counter() - start; "
+                f"print(elapsed, ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+        elapsed, loaded = float(output[0]), output[1] if len(output) > 1 else ""
+        report(f"import.{module}", elapsed * 1000, "ms", higher_is_better=False)
+        print(f"import {module}: {elapsed * 1000:.1f} ms" + (f" (loaded {loaded})" if loaded else ""))
+        if elapsed > budget or loaded:
+            over_budget.append(module)
+    assert not over_budget, f"import budget exceeded: {over_budget}"
+
+
+# GUIs timed from interpreter start to their first frame with icons on screen:
+# name -> (module, GUI class, statement that shows the icons)
+STARTUP_GUIS = {
+    "slot": ("Slot", "SlotMachineGUI", "[app.reel_1_label.config(image=app.images[s]) for s in ('Cherry', 'Bar', '7')]"),
+    "race": ("Racing_blockchain", "HorseRaceGUI", "None"),
+}
+
+
+def bench_startup(repeat=3):
+    # Time to first frame, cold (the icon atlas is built from img/ with PIL) and warm (the cached
+    # atlas is loaded by Tk). Needs a display; skipped without one.
+    for name, (module, gui, show) in STARTUP_GUIS.items():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            code = (f"import time; start = time.perf_counter(); import tkinter, asset_cache, {module}; "
+                    f"asset_cache.CACHE_DIR = {cache_dir!r}; root = tkinter.Tk(); app = {module}.{gui}(root); "
+                    f"{show}; root.update(); print(time.perf_counter() - start); root.destroy()")
+            times = []
+            for _ in range(1 + repeat):
+                result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+                if result.returncode:
+                    print(f"startup {name}: skipped ({result.stderr.strip().splitlines()[-1]})")
+                    break
+                times.append(float(result.stdout.split()[0]))
+            else:
+                cold, warm = times[0], min(times[1:])
+                report(f"startup.{name}.cold", cold * 1000, "ms", higher_is_better=False)
+                report(f"startup.{name}.warm", warm * 1000, "ms", higher_is_better=False)
+                print(f"startup {name}: first frame in {cold * 1000:.0f} ms cold, {warm * 1000:.0f} ms warm")
+
+
+SLOT_RECORD = {"Spin Result": ["7", "Bar", "7"], "Outcome": "Win", "Amount": 10, "Balance After Spin": 110}
+
+
+def bench_micro():
+    # Hot paths one call at a time
+    block = Block(1, "ab" * 32, None, SLOT_RECORD, 12345, timestamp_ns=time.time_ns())
+    report("block.hash_block", measure(block.hash_block), "ops/s")
+
+    slot = SlotMachine(HashRNG(b"benchmark", b""))
+    spins = itertools.cycle(slot.spins(4096))
+    report("slot.evaluate_spin", measure(lambda: slot.evaluate_spin(next(spins))), "ops/s")
+    batch = slot.spin_ids(100000)
+    report("slot.evaluate_batch", 100000 * measure(lambda: slot.evaluate_batch(batch)), "spins/s")
+
+    blockchain = Blockchain(difficulty=8)
+    blackjack = BlackjackGame(blockchain=blockchain, rng=HashRNG(b"benchmark", b""))
+    blackjack.shuffle_deck()
+    deck = blackjack.deck[:]
+    report("blackjack.calculate_hand_value", measure(lambda: blackjack.calculate_hand_value([10, "K", 5])), "ops/s")
+
+    def play_dealer():
+        blackjack.deck = deck[:]
+        blackjack.dealer_hand = [2, 3]
+        blackjack.play_dealer()
+    report("blackjack.play_dealer", measure(play_dealer), "ops/s")
+
+    egg = EggGame(blockchain=blockchain, submit=lambda animal: None, rng=HashRNG(b"benchmark", b""))
+
+    def break_egg():
+        egg.break_egg()
+        egg.collection.clear()
+    report("egg.break_egg", measure(break_egg), "ops/s")
+
+    report("blockchain.add_block", measure(lambda: blockchain.add_block(SLOT_RECORD, 12345)), "ops/s")
+
+    blocks = len(blockchain.chain)
+    report("export_chain.jsonl", blocks * measure(lambda: export_chain(blockchain.chain, io.StringIO()), repeat=3), "blocks/s")
+
+    for name, value in RESULTS.items():
+        if name.split(".")[0] in ("block", "slot", "blackjack", "egg", "blockchain", "export_chain"):
+            print(f"{name}: {value['value']:,.0f} {value['unit']}")
+
+
+def bench_difficulty(difficulties=(8, 12, 16), min_time=1.0):
+    # Blockchain.proof_of_work (serial, no proof cache) along the same chain of proofs
+    for difficulty in difficulties:
+        blockchain = Blockchain(difficulty=difficulty)
+        last_proof = 100
+        blocks = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < min_time:
+            last_proof = blockchain.proof_of_work(last_proof)
+            blocks += 1
+        rate = blocks / (time.perf_counter() - start)
+        report(f"proof_of_work.difficulty_{difficulty}", rate, "blocks/s")
+        print(f"proof_of_work [difficulty {difficulty}]: {rate:,.1f} blocks/s")
+
+
+def game_events():
+    # One event maker per game, each returning the record its GUI would submit
+    rng = HashRNG(b"benchmark", b"")
+    slot = SlotMachine(rng)
+    race = HorseRace(rng)
+    roulette = RussianRoulette(rng)
+    blackjack = BlackjackGame(blockchain=Blockchain(difficulty=8), rng=rng)
+    balance = [100]
+    positions = [0, 0, 0]
+
+    def slot_event():
+        spin_result = slot.spin()
+        outcome, amount = slot.evaluate_spin(spin_result)
+        balance[0] += amount
+        return {"Spin Result": spin_result, "Outcome": outcome, "Amount": amount, "Balance After Spin": balance[0]}
+
+    def race_event():
+        spin_result = race.spin()
+        for i in range(3):
+            positions[i] += spin_result[i]
+        return {"Spin Result": spin_result, "Player Positions": positions.copy()}
+
+    def roulette_event():
+        chamber, bullet_fired = roulette.pull_trigger(roulette.gun1_chambers)
+        return {"Player": "Player 1", "Gun": 1, "Chamber Fired": chamber, "Bullet Location": roulette.gun1_chambers,
+                "Outcome": "Lost" if bullet_fired else "Survived", "Lives Before Spin": 1}
+
+    def blackjack_event():
+        blackjack.new_game()
+        blackjack.play_dealer()
+        return {"Player Hand": blackjack.player_hand, "Dealer Hand": blackjack.dealer_hand,
+                "Result": blackjack.check_winner()[0]}
+
+    eggs = []
+    egg = EggGame(blockchain=blackjack.blockchain, submit=eggs.append, rng=rng)
+
+    def egg_event():
+        egg.break_egg()
+        return eggs.pop()
+
+    return {"slot": slot_event, "race": race_event, "roulette": roulette_event, "blackjack": blackjack_event,
+            "egg": egg_event}
+
+
+def bench_games(seconds=1.0, difficulty=DIFFICULTY_BITS):
+    # End to end: events per second with mining, one block per event (how the GUIs record) and
+    # through a Mempool that seals a block every 0.1 s
+    for game, make_event in game_events().items():
+        blockchain = Blockchain(difficulty=difficulty)
+        events = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            data = make_event()
+            blockchain.add_block(data, blockchain.proof_of_work(blockchain.get_last_block().proof))
+            events += 1
+        per_block = events / (time.perf_counter() - start)
+
+        blockchain = Blockchain(difficulty=difficulty)
+        mempool = Mempool(blockchain, interval=0.1, max_records=100000)
+        events = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            mempool.submit(make_event())
+            events += 1
+        mempool.close()
+        batched = events / (time.perf_counter() - start)
+
+        report(f"game.{game}.mined_per_event", per_block, "events/s")
+        report(f"game.{game}.mempool", batched, "events/s")
+        print(f"{game}: {per_block:,.1f} events/s mined per event, {batched:,.0f} events/s through a mempool")
+
+    # Slot autoplay: a run of spins evaluated in one loop and recorded as one batched block
+    blockchain = Blockchain(difficulty=difficulty)
+    slot = SlotMachine(HashRNG(b"benchmark", b""))
+
+    def autoplay():
+        records, _ = slot.autoplay(AUTOPLAY_SPINS, 10 ** 9)
+        blockchain.add_block(batch_data(records), blockchain.proof_of_work(blockchain.get_last_block().proof))
+    rate = AUTOPLAY_SPINS * measure(autoplay, min_time=seconds, repeat=1)
+    report("game.slot.autoplay", rate, "events/s")
+    print(f"slot autoplay: {rate:,.0f} spins/s, {AUTOPLAY_SPINS} spins per mined block")
+
+
+def bench_metrics_overhead():
+    # Cost of metrics.enabled per slot event on the path the GUIs usually take: spin, evaluate,
+    # a proof that is a ProofCache hit, then hash and append the block
+    make_event = game_events()["slot"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ProofCache(os.path.join(cache_dir, "proofs.bin"))
+        last_proof = 100
+        cache.put(last_proof, Blockchain().proof_of_work(last_proof))
+
+        rates = {False: 0, True: 0}
+        for round_number in range(10):  # Alternate the order, keeping each side's best, so drift hits both alike
+            for flag in ((False, True) if round_number % 2 else (True, False)):
+                metrics.enabled = flag
+                blockchain = Blockchain(cache=cache)
+                rates[flag] = max(rates[flag], measure(
+                    lambda: blockchain.add_block(make_event(), blockchain.proof_of_work(last_proof))))
+        cache.close()
+    metrics.disable()
+    metrics.reset()
+    overhead = rates[False] / rates[True] - 1
+    report("metrics.overhead", overhead * 100, "%", higher_is_better=False)
+    print(f"metrics overhead: {overhead:.1%} per cached-proof slot event ({rates[False]:,.0f} -> {rates[True]:,.0f} events/s)")
+
+
+BENCHMARKS = {
+    "micro": bench_micro,
+    "difficulty": bench_difficulty,
+    "games": bench_games,
+    "proof_of_work": bench_proof_of_work,
+    "block_memory": bench_block_memory,
+    "rng": bench_rng,
+    "metrics": bench_metrics_overhead,
+    "import_time": bench_import_time,
+    "startup": bench_startup,
+}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    # Returns the names of results that fell more than `tolerance` behind the baseline
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or not base["value"] or not result["value"]:
+            continue
+        if result["higher_is_better"]:
+            ratio = result["value"] / base["value"]
+        else:
+            ratio = base["value"] / result["value"]
+        flag = "REGRESSION" if ratio < 1 - tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:45} {base['value']:>14,.1f} -> {result['value']:>14,.1f} {result['unit']:12} {ratio:6.2f}x {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chain and the game engines")
+    parser.add_argument("--only", help=f"comma-separated benchmarks to run, from {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", default=OUTPUT, help="JSON file for the results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    for name in (args.only.split(",") if args.only else BENCHMARKS):
+        print(f"== {name}")
+        BENCHMARKS[name]()
+
+    with open(args.output, "w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(), "time": time.time(),
+                   "results": RESULTS}, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print(f"== compared with {args.baseline}")
+        regressions = compare(RESULTS, baseline, args.tolerance)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,31 @@
-import tkinter as tk
-import hashlib
-import time
-import random
-from tkinter import messagebox
-
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
-
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from chain_export import export_chain
+from chain_viewer import ChainViewer
+from hash_rng import SYSTEM, GameSeed
+
+# GUI modules load on first use, so BlackjackGame can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
 
 class BlackjackGame:
-    def __init__(self):
+    def __init__(self, blockchain=None, rng=SYSTEM):
+        # rng: a hash_rng.HashRNG for shuffles that can be reproduced from the chain
+        self.rng = rng
         self.deck = self.create_deck()
         self.player_hand = []
         self.dealer_hand = []
-        self.blockchain = Blockchain()
+        # Sessions hosted by game_server.py share the server's chain instead of mining their own
+        self.blockchain = blockchain if blockchain is not None else Blockchain(cache=ProofCache())
 
     def create_deck(self):
         # 4 sets of each card: J (10), Q (10), K (10) added along with 2 to 9
         return [2, 3, 4, 5, 6, 7, 8, 9, 10, 'J', 'Q', 'K'] * 4
 
     def shuffle_deck(self):
-        random.shuffle(self.deck)
+        self.rng.shuffle(self.deck)
 
     def deal_card(self, hand):
         card = self.deck.pop()
@@ -112,7 +80,16 @@ class BlackjackGame:
 class BlackjackGUI:
     def __init__(self, root):
         self.game = BlackjackGame()
+        # Shuffles come from a HashRNG tied to the chain, so replay.py can re-make them. Every
+        # deal is recorded, including ones abandoned for a new game, so none of them is skipped.
+        self.seed = GameSeed(self.game.blockchain, "Blackjack")
+        self.game.rng = self.seed.rng
+        self.deals = 0
+        self.in_play = False
+        self.round_fields = {}
         self.root = root
+        self.block_worker = BlockWorker(self.game.blockchain, self.root)
+        self.block_worker.submit(self.seed.commitment(), callback=self.seed.on_sealed)
         self.root.title("Blockchain Blackjack")
         
         # Increase window size and font
@@ -160,7 +137,13 @@ class BlackjackGUI:
         self.dealer_cards_label.config(text=dealer_text)
 
     def new_game(self):
+        if self.in_play:
+            self.record("Abandoned")
+
         # Reset the game state
+        self.round_fields = self.seed.begin_round()
+        self.deals += 1
+        self.in_play = True
         self.game.new_game()
         self.update_display(reveal_dealer=False)  # Only show the first dealer card at the start
         self.status_label.config(text="")  # Clear status message
@@ -186,29 +169,36 @@ class BlackjackGUI:
         self.hit_button.config(state=tk.DISABLED)
         self.stand_button.config(state=tk.DISABLED)
 
-        # Record the result on the blockchain
-        last_proof = self.game.blockchain.get_last_block().proof
-        proof = self.game.blockchain.proof_of_work(last_proof)
-        data = {
-            "Player Hand": self.game.player_hand,
-            "Dealer Hand": self.game.dealer_hand,
-            "Result": result
-        }
-        self.game.blockchain.add_block(data, proof)
+        self.record(result)
 
         if result == "Player Busts" or result == "Dealer Wins":
             messagebox.showinfo("Game Over", f"{result}. You lost!")
         elif result == "Player Wins":
             messagebox.showinfo("Game Over", f"{result}. You won!")
 
+    def record(self, result):
+        # Record the deal on the blockchain (mined in the background)
+        self.in_play = False
+        data = {
+            "Player Hand": self.game.player_hand,
+            "Dealer Hand": self.game.dealer_hand,
+            "Result": result,
+            "Deal": self.deals,
+            **self.round_fields,
+        }
+        self.block_worker.submit(data, callback=self.seed.on_sealed)
+
     def quit_game(self):
-        # Display blockchain information
-        blockchain_info = "\nBlockchain:\n"
-        for block in self.game.blockchain.chain:
-            blockchain_info += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
-        
-        messagebox.showinfo("Blockchain", blockchain_info)
-        self.root.quit()
+        # Reveal the seed, then wait for queued records to be mined before showing the chain
+        if not self.block_worker.closed:
+            if self.in_play:
+                self.record("Abandoned")
+            self.block_worker.submit(self.seed.reveal())
+        self.block_worker.close()
+
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits)
+        export_chain(self.game.blockchain.chain, "blackjack_blockchain.jsonl")
+        ChainViewer(self.root, self.game.blockchain.chain, on_close=self.root.quit)
 
 if __name__ == "__main__":
     root = tk.Tk()
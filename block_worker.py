@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import traceback
+
+import metrics
+from merkle import batch_data
+
+# Mines and appends blocks on a background thread so Tk event handlers never wait on
+# proof_of_work. Records are mined strictly in the order they were submitted.
+# With batch_size > 1, records are collected into Merkle-batched blocks (see merkle.py)
+# that are sealed once batch_size records are waiting or batch_timeout seconds have passed.
+# A batch that cannot be mined or appended (e.g. a record the codec cannot encode) is dropped
+# and reported through on_error / errors; the worker keeps running, so flush() and close()
+# still return.
+
+count_event = metrics.counter("events").tick
+FLUSH = object()
+STOP = object()
+
+
+class BlockWorker:
+    def __init__(self, blockchain, root=None, maxsize=64, poll_interval=50, batch_size=1, batch_timeout=None,
+                 on_error=None):
+        # root: Tk root used to run completion callbacks on the main loop (optional)
+        # on_error(exception, records): runs like a completion callback when a batch fails;
+        # without it the traceback is printed
+        # maxsize: pending records allowed before submit() blocks the caller
+        self.blockchain = blockchain
+        self.root = root
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.pending = queue.Queue(maxsize=maxsize)
+        self.completed = queue.Queue()
+        self.on_error = on_error
+        self.errors = []  # (exception, records) for every batch that failed
+        self.next_index = len(blockchain.chain)  # Index the next submitted record will get (unbatched)
+        self.closed = False
+
+        self.thread = threading.Thread(target=self.run, name="block-worker", daemon=True)
+        self.thread.start()
+        if self.root is not None:
+            self.root.after(self.poll_interval, self.poll)
+
+    def submit(self, data, callback=None):
+        # Queue a record for mining; blocks while the queue is full (backpressure).
+        # callback(block, position) runs on the Tk main loop once the record is on the chain;
+        # position is the record's place in a batched block (0 when unbatched).
+        if self.closed:
+            raise RuntimeError("BlockWorker is closed")
+        index = self.next_index
+        if self.batch_size <= 1:
+            self.next_index += 1
+        self.pending.put((data, callback))
+        if metrics.enabled:
+            count_event()
+        return index
+
+    def run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None
+            if batch and deadline is not None:
+                timeout = max(0, deadline - time.monotonic())
+            try:
+                item = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                self.seal(batch)  # batch_timeout reached
+                batch = []
+                continue
+
+            if item is STOP:
+                self.seal(batch)
+                self.pending.task_done()
+                return
+            if item is FLUSH:
+                self.seal(batch)
+                batch = []
+                self.pending.task_done()
+                continue
+
+            if not batch and self.batch_timeout is not None:
+                deadline = time.monotonic() + self.batch_timeout
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.seal(batch)
+                batch = []
+
+    def seal(self, batch):
+        # Mine one block for the batch and mark its records done
+        if not batch:
+            return
+        try:
+            if self.batch_size <= 1:
+                data = batch[0][0]
+            else:
+                data = batch_data([record for record, _ in batch])
+            last_proof = self.blockchain.get_last_block().proof
+            proof = self.blockchain.proof_of_work(last_proof)
+            self.blockchain.add_block(data, proof)
+
+            block = self.blockchain.get_last_block()
+            for position, (_, callback) in enumerate(batch):
+                if callback is not None:
+                    self.completed.put((callback, block, position))
+        except Exception as e:
+            records = [record for record, _ in batch]
+            self.errors.append((e, records))
+            if self.on_error is not None:
+                self.completed.put((self.on_error, e, records))
+            else:
+                traceback.print_exception(e)
+        finally:
+            for _ in batch:
+                self.pending.task_done()
+
+    def poll(self):
+        # Runs on the Tk thread: deliver finished callbacks, then reschedule
+        self.run_callbacks()
+        if not self.closed:
+            self.root.after(self.poll_interval, self.poll)
+
+    def run_callbacks(self):
+        while True:
+            try:
+                callback, *args = self.completed.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def flush(self):
+        # Seal any partial batch, wait until every submitted record is on the chain,
+        # then run the outstanding callbacks
+        self.pending.put(FLUSH)
+        self.pending.join()
+        self.run_callbacks()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self.pending.put(STOP)
+        self.thread.join()
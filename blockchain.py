@@ -0,0 +1,323 @@
+import hashlib
+import math
+import os
+import struct
+import time
+from collections import deque
+from functools import lru_cache
+
+import codec
+import metrics
+from metrics import SAMPLE_EVERY
+
+# Shared blockchain used by every game.
+# Proof of Work: find the smallest nonce whose sha256(last_proof + nonce) has `difficulty`
+# leading zero bits (16 by default, the same as a "0000" hex prefix).
+
+CHUNK_SIZE = 20000  # Nonces handed to a worker at a time
+DIFFICULTY_BITS = 16  # Leading zero bits required, 16 bits == "0000" hex prefix
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 32
+BLOCK_HEADER = struct.Struct(">QQQBB")  # index, timestamp_ns, proof, difficulty, previous hash length
+# pack_blocks: index, timestamp_ns, proof, difficulty, previous hash length, previous hash, hash, payload length
+PACKED_BLOCK = struct.Struct("<QQQBB32s32sI")
+count_block = metrics.counter("blocks").tick  # Bound here so the hot path counts without a lookup
+count_proof_cache_hit = metrics.counter("proof_cache_hits").tick
+
+
+@lru_cache(maxsize=None)
+def difficulty_target(bits):
+    # A digest has at least `bits` leading zero bits exactly when it sorts below this value
+    return (1 << (256 - bits)).to_bytes(32, "big")
+
+
+def valid_proof(last_proof, proof, difficulty=DIFFICULTY_BITS):
+    guess = f"{last_proof}{proof}".encode()
+    return hashlib.sha256(guess).digest() < difficulty_target(difficulty)
+
+
+def search_nonces(last_proof, start, stop, difficulty=DIFFICULTY_BITS):
+    # Return the first valid proof in [start, stop), or None.
+    # Hot loop: the last_proof prefix is hashed once and its state copied per nonce,
+    # and the nonce is kept as ASCII digits in a bytearray that is incremented in place.
+    prefix = hashlib.sha256(str(last_proof).encode())
+    copy = prefix.copy
+    target = difficulty_target(difficulty)
+    digits = bytearray(str(start).encode())
+    for proof in range(start, stop):
+        guess = copy()
+        guess.update(digits)
+        if guess.digest() < target:
+            return proof
+
+        # digits += 1
+        i = len(digits) - 1
+        while i >= 0 and digits[i] == 57:  # "9"
+            digits[i] = 48  # "0"
+            i -= 1
+        if i < 0:
+            digits.insert(0, 49)  # "1"
+        else:
+            digits[i] += 1
+    return None
+
+
+class Block:
+    # Blocks are kept compact for long sessions: no __dict__, raw 32-byte hashes, an integer
+    # nanosecond timestamp, and the data held only as its canonical encoding (codec.py), decoded
+    # the first time .data is read. The usual attributes are still available as properties:
+    # hash / previous_hash as hex strings, timestamp as float seconds.
+    #
+    # The block hash is sha256(header + payload), where the header is the fixed-size fields
+    # plus the length-prefixed previous hash and payload length. It is computed once and cached;
+    # hash_block() recomputes it for verification.
+    __slots__ = ("index", "proof", "difficulty", "timestamp_ns", "_previous_hash", "_hash", "_data", "_payload")
+
+    def __init__(self, index, previous_hash, timestamp, data, proof, difficulty=DIFFICULTY_BITS,
+                 timestamp_ns=None, block_hash=None, payload=None):
+        # timestamp: seconds (as from time.time()); timestamp_ns takes precedence when given
+        # block_hash / payload: raw hash and encoded data of a stored or received block, so it
+        # is neither re-encoded nor re-hashed
+        self.index = index
+        self.previous_hash = previous_hash
+        self.timestamp_ns = timestamp_ns if timestamp_ns is not None else round(timestamp * 1e9)
+        self._data = None
+        self._payload = payload if payload is not None else codec.encode(data)
+        self.proof = proof
+        self.difficulty = difficulty  # Difficulty the proof was mined at
+        self._hash = block_hash if block_hash is not None else self.hash_digest()
+
+    @property
+    def timestamp(self):
+        return self.timestamp_ns / 1e9
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = codec.decode(self._payload)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._payload = codec.encode(value)
+
+    @property
+    def payload(self):
+        return self._payload
+
+    @property
+    def hash(self):
+        return self._hash.hex()
+
+    @hash.setter
+    def hash(self, value):
+        self._hash = bytes.fromhex(value)
+
+    @property
+    def raw_hash(self):
+        return self._hash
+
+    @property
+    def previous_hash(self):
+        # Genesis links to "0" rather than a real hash
+        raw = self._previous_hash
+        return raw.hex() if len(raw) == 32 else raw.decode()
+
+    @previous_hash.setter
+    def previous_hash(self, value):
+        # Raw bytes are kept as is, so a block can share its parent's hash object
+        if isinstance(value, bytes):
+            self._previous_hash = value
+        else:
+            self._previous_hash = bytes.fromhex(value) if len(value) == 64 else value.encode()
+
+    def header(self, payload):
+        return BLOCK_HEADER.pack(self.index, self.timestamp_ns, self.proof, self.difficulty, len(self._previous_hash)) \
+            + self._previous_hash + codec.U32.pack(len(payload))
+
+    def current_payload(self):
+        # The data as it is now: decoded data is re-encoded, so changes made through .data count
+        return self._payload if self._data is None else codec.encode(self._data)
+
+    def hash_digest(self):
+        # Re-encode decoded data so changes made through .data are caught by verification
+        timing = metrics.enabled and not self.index % SAMPLE_EVERY
+        if timing:
+            start = time.perf_counter_ns()
+        payload = self._payload if self._data is None else codec.encode(self._data)
+        digest = hashlib.sha256(self.header(payload) + payload).digest()
+        if timing:
+            metrics.observe("hashing", start)
+        return digest
+
+    def hash_block(self):
+        return self.hash_digest().hex()
+
+
+def pack_blocks(blocks):
+    # Blocks as one bytes object, for handing a run of blocks to another process far faster
+    # than pickling them. Decoded data is re-encoded (current_payload), so edits carry over.
+    pack = PACKED_BLOCK.pack
+    parts = []
+    for block in blocks:
+        payload = block.current_payload()
+        parts.append(pack(block.index, block.timestamp_ns, block.proof, block.difficulty, len(block._previous_hash),
+                          block._previous_hash, block._hash, len(payload)))
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def unpack_blocks(data):
+    position = 0
+    while position < len(data):
+        index, timestamp_ns, proof, difficulty, previous_length, previous_hash, block_hash, length = \
+            PACKED_BLOCK.unpack_from(data, position)
+        position += PACKED_BLOCK.size
+        yield Block(index, previous_hash[:previous_length], None, None, proof, difficulty, timestamp_ns=timestamp_ns,
+                    block_hash=block_hash, payload=data[position:position + length])
+        position += length
+
+
+class Blockchain:
+    def __init__(self, workers=1, cache=None, difficulty=DIFFICULTY_BITS, target_block_time=None, retarget_window=10, store=None, chain_index=None):
+        # workers: number of processes used by proof_of_work (None = all cores)
+        # cache: optional ProofCache (see proof_cache.py) consulted before mining
+        # difficulty: leading zero bits required by proof_of_work
+        # target_block_time: seconds of mining per block to aim for (None = fixed difficulty)
+        # store: optional ChainStore (see chain_store.py) holding the chain on disk
+        # chain_index: optional ChainIndex (see chain_index.py) updated by add_block; it is
+        # caught up with the blocks already in store
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.difficulty = difficulty
+        self.target_block_time = target_block_time
+        self.mining_times = deque(maxlen=retarget_window)
+        self.pool = None
+        self.chain_index = chain_index
+        self.chain = store if store is not None else []
+        if len(self.chain) == 0:
+            self.create_genesis_block()
+        elif self.chain_index is not None:
+            self.chain_index.catch_up(self.chain)
+
+    def create_genesis_block(self):
+        genesis_block = Block(0, "0", None, "Genesis Block", 100, timestamp_ns=time.time_ns())
+        self.chain.append(genesis_block)
+        if self.chain_index is not None:
+            self.chain_index.add(genesis_block)
+
+    def get_last_block(self):
+        return self.chain[-1]
+
+    def add_block(self, data, proof):
+        last_block = self.get_last_block()
+        new_block = Block(len(self.chain), last_block.raw_hash, None, data, proof, self.difficulty, timestamp_ns=time.time_ns())
+        if self.chain_index is not None:
+            self.chain_index.check(new_block)  # Before appending, so chain and index stay in step
+        self.chain.append(new_block)
+        if self.chain_index is not None:
+            self.chain_index.add(new_block)
+        if metrics.enabled:
+            count_block()
+        self.retarget()
+
+    def retarget(self):
+        # Once the sliding window is full, move the difficulty so the average mining time
+        # approaches target_block_time. Each extra bit doubles the expected work.
+        if self.target_block_time is None or len(self.mining_times) < self.mining_times.maxlen:
+            return
+        average = sum(self.mining_times) / len(self.mining_times)
+        step = round(math.log2(self.target_block_time / max(average, 1e-6)))
+        step = max(-2, min(2, step))
+        if step:
+            self.difficulty = max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, self.difficulty + step))
+            self.mining_times.clear()
+
+    def proof_of_work(self, last_proof, cancel=None):
+        # cancel: optional threading.Event / multiprocessing.Event; returns None if it gets set
+        # The proof cache only holds proofs for the default difficulty
+        use_cache = self.cache is not None and self.difficulty == DIFFICULTY_BITS
+        if use_cache:
+            proof = self.cache.get(last_proof)
+            if proof is not None:
+                if metrics.enabled:
+                    count_proof_cache_hit()
+                return proof
+
+        start = time.perf_counter()
+        if self.workers <= 1:
+            proof = self.serial_proof_of_work(last_proof, cancel)
+        else:
+            proof = self.parallel_proof_of_work(last_proof, cancel)
+        if proof is None:
+            return None
+        self.mining_times.append(time.perf_counter() - start)
+        if metrics.enabled:
+            metrics.histogram("mining").observe(round(self.mining_times[-1] * 1e9))
+            metrics.count("nonce_attempts", proof + 1)  # The search covers every nonce below the proof
+
+        if use_cache:
+            self.cache.put(last_proof, proof)
+        return proof
+
+    def serial_proof_of_work(self, last_proof, cancel=None):
+        start = 0
+        while cancel is None or not cancel.is_set():
+            proof = search_nonces(last_proof, start, start + CHUNK_SIZE, self.difficulty)
+            if proof is not None:
+                return proof
+            start += CHUNK_SIZE
+        return None
+
+    def parallel_proof_of_work(self, last_proof, cancel=None):
+        # Split the nonce space into ordered chunks and search them on a process pool.
+        # A hit in chunk k is only returned once every chunk before k has come back empty,
+        # so the result is the same smallest proof the serial search finds.
+        # Imported here so single-core users never pay for multiprocessing at import time
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        in_flight = {}  # future -> chunk number
+        results = {}  # chunk number -> proof or None
+        next_chunk = 0
+        lowest_pending = 0
+
+        try:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return None
+
+                # Keep two chunks per worker queued so no core sits idle
+                while len(in_flight) < self.workers * 2:
+                    start = next_chunk * CHUNK_SIZE
+                    future = self.pool.submit(search_nonces, last_proof, start, start + CHUNK_SIZE, self.difficulty)
+                    in_flight[future] = next_chunk
+                    next_chunk += 1
+
+                done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[in_flight.pop(future)] = future.result()
+
+                while lowest_pending in results:
+                    proof = results.pop(lowest_pending)
+                    if proof is not None:
+                        return proof
+                    lowest_pending += 1
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self):
+        # Shut down the mining pool (if one was started)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def is_valid_proof(self, last_proof, proof, difficulty=None):
+        # difficulty: bits to check against, defaults to the current difficulty
+        if difficulty is None:
+            difficulty = self.difficulty
+        return valid_proof(last_proof, proof, difficulty)
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import sys
+
+import codec
+from chain_store import encode_block
+
+# Streaming chain export. Blocks are read, encoded and written one at a time, so exporting
+# never builds the whole chain in memory, whether it is a list or an on-disk ChainStore.
+#
+#   jsonl   one JSON object per block
+#   csv     index, timestamp, hash, previous_hash, proof, difficulty, data (as JSON)
+#   binary  the ChainStore record format (header + canonical payload)
+
+CSV_COLUMNS = ["index", "timestamp", "hash", "previous_hash", "proof", "difficulty", "data"]
+
+
+def json_default(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"cannot export {type(value).__name__}")
+
+
+def iter_blocks(chain, indices=None, where=None, decode=True):
+    # indices: optional block indexes to export (e.g. from a ChainIndex lookup)
+    # where: optional predicate where(block, data) -> bool
+    # decode: set to False to skip decoding (data is then None) when nothing needs it
+    # Pruned chains (chain_prune.py) start at their oldest available block
+    for i in (range(getattr(chain, "first_index", 0), len(chain)) if indices is None else indices):
+        block = chain[i]
+        # Decode the payload directly so the block does not keep a decoded copy around
+        data = codec.decode(block.payload) if decode or where is not None else None
+        if where is None or where(block, data):
+            yield block, data
+
+
+def block_fields(block, data):
+    return {
+        "index": block.index,
+        "timestamp": block.timestamp,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "proof": block.proof,
+        "difficulty": block.difficulty,
+        "data": data,
+    }
+
+
+def export_chain(chain, out, format="jsonl", indices=None, where=None):
+    # out: a path, "-" for stdout, or an open file (binary for format="binary")
+    # Returns the number of blocks written.
+    if out == "-":
+        out = sys.stdout.buffer if format == "binary" else sys.stdout
+    if isinstance(out, str):
+        with (open(out, "wb") if format == "binary" else open(out, "w", newline="")) as f:
+            return export_chain(chain, f, format, indices, where)
+
+    count = 0
+    blocks = iter_blocks(chain, indices, where, decode=format != "binary")
+    if format == "jsonl":
+        for block, data in blocks:
+            out.write(json.dumps(block_fields(block, data), default=json_default))
+            out.write("\n")
+            count += 1
+    elif format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        for block, data in blocks:
+            fields = block_fields(block, data)
+            fields["data"] = json.dumps(data, default=json_default)
+            writer.writerow([fields[column] for column in CSV_COLUMNS])
+            count += 1
+    elif format == "binary":
+        for block, _ in blocks:
+            out.write(encode_block(block))
+            count += 1
+    else:
+        raise ValueError(f"unknown export format {format!r}")
+    return count
+
+
+def chain_summary(chain, last=20):
+    # Short text for a message box: the last few blocks only
+    lines = io.StringIO()
+    start = max(len(chain) - last, getattr(chain, "first_index", 0))
+    if start:
+        lines.write(f"... {start} earlier blocks\n")
+    for block, data in iter_blocks(chain, range(start, len(chain))):
+        lines.write(f"Index: {block.index}, Hash: {block.hash}, Data: {data}\n")
+    return lines.getvalue()
@@ -0,0 +1,166 @@
+import os
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+import codec
+
+# Secondary indexes over a chain: player / account, outcome, transaction hash and game type,
+# plus a timestamp column for time-range scans. Blockchain(chain_index=ChainIndex()) keeps it
+# up to date in add_block; save() / ChainIndex.load() persist it next to the chain, and
+# load() catches up with (or rebuilds from) the chain it is given. An index of a pruned chain
+# (chain_prune.py) starts at the chain's first_index.
+
+# Record keys each index is built from; batched blocks index every event in the batch
+FIELDS = {
+    "player": ("Player", "Account"),
+    "outcome": ("Outcome", "Result"),
+    "tx_hash": ("Transaction Hash",),
+    "game": ("Game",),
+}
+
+# Records without a "Game" key are classified by a key only that game records
+GAME_KEYS = (
+    ("Player Positions", "Horse Race"),
+    ("Player Hand", "Blackjack"),
+    ("Chamber Fired", "Russian Roulette"),
+    ("Animal", "Egg"),
+    ("tier", "Egg"),
+    ("Spin Result", "Slot Machine"),
+)
+
+
+def game_of(record):
+    if "Game" in record:
+        return record["Game"]
+    for key, game in GAME_KEYS:
+        if key in record:
+            return game
+    return None
+
+
+def sort_key(value):
+    # Ints sort numerically, before strings
+    return isinstance(value, str), value
+
+
+class ChainIndex:
+    def __init__(self):
+        self.first = 0  # Index of the first block indexed
+        self.count = 0  # Index of the next block to index
+        self.timestamps = array("q")  # timestamp_ns per block from `first`
+        self.postings = {field: {} for field in FIELDS}  # field -> value -> array of block indexes
+        self.keys = {field: [] for field in FIELDS}  # field -> sorted sort_key() of every value, for range scans
+
+    @classmethod
+    def build(cls, chain):
+        index = cls()
+        index.catch_up(chain)
+        return index
+
+    def check(self, block):
+        # Raise unless the block is the next one to index
+        if block.index != self.count:
+            raise ValueError(f"expected block {self.count}, got {block.index}")
+
+    def catch_up(self, chain):
+        # Index the blocks the chain has beyond this index; start over if the index is ahead of
+        # the chain or behind the oldest block it can still read
+        first_index = getattr(chain, "first_index", 0)
+        if (self.count > len(chain) or len(self.timestamps) != self.count - self.first
+                or self.count < first_index):
+            self.__init__()
+        if self.count == self.first < first_index:
+            self.first = self.count = first_index
+        for i in range(self.count, len(chain)):
+            self.add(chain[i])
+
+    def add(self, block):
+        self.check(block)
+        self.timestamps.append(block.timestamp_ns)
+        self.count += 1
+
+        # Decode the payload directly so the block does not keep a decoded copy around
+        data = codec.decode(block.payload)
+        if not isinstance(data, dict):
+            return
+        records = data["Events"] if "Merkle Root" in data else [data]
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            values = {field: [record[key] for key in keys if key in record] for field, keys in FIELDS.items()}
+            values["game"] = [game_of(record)]
+            for field, found in values.items():
+                for value in found:
+                    if isinstance(value, (str, int)) and not isinstance(value, bool):
+                        self.post(field, value, block.index)
+
+    def post(self, field, value, block_index):
+        blocks = self.postings[field].get(value)
+        if blocks is None:
+            blocks = self.postings[field][value] = array("Q")
+            insort(self.keys[field], sort_key(value))
+        if not blocks or blocks[-1] != block_index:
+            blocks.append(block_index)
+
+    def lookup(self, field, value):
+        # Block indexes whose records have `value` for `field`, in chain order
+        return list(self.postings[field].get(value, ()))
+
+    def by_player(self, player):
+        return self.lookup("player", player)
+
+    def by_outcome(self, outcome):
+        return self.lookup("outcome", outcome)
+
+    def by_tx_hash(self, tx_hash):
+        return self.lookup("tx_hash", tx_hash)
+
+    def by_game(self, game):
+        return self.lookup("game", game)
+
+    def by_time(self, start, end):
+        # Block indexes with start <= timestamp < end (seconds); timestamps only grow along the chain
+        first = bisect_left(self.timestamps, round(start * 1e9))
+        last = bisect_left(self.timestamps, round(end * 1e9))
+        return range(self.first + first, self.first + last)
+
+    def values(self, field, low=None, high=None):
+        # Range scan over the indexed values of a field (low <= value <= high), in sorted order
+        keys = self.keys[field]
+        first = bisect_left(keys, sort_key(low)) if low is not None else 0
+        last = bisect_right(keys, sort_key(high)) if high is not None else len(keys)
+        return [value for _, value in keys[first:last]]
+
+    def save(self, path):
+        state = {
+            "first": self.first,
+            "count": self.count,
+            "timestamps": self.timestamps.tobytes(),
+            "postings": {field: {value: blocks.tobytes() for value, blocks in values.items()}
+                         for field, values in self.postings.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(codec.encode(state))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, chain):
+        # Load a saved index and index any blocks added to the chain since it was saved.
+        # Rebuilds from the chain if the file is missing, unreadable or ahead of the chain.
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                state = codec.decode(f.read())
+            index.first = state.get("first", 0)
+            index.count = state["count"]
+            index.timestamps.frombytes(state["timestamps"])
+            for field, values in state["postings"].items():
+                for value, blocks in values.items():
+                    index.postings[field][value] = array("Q", blocks)
+                index.keys[field] = sorted(map(sort_key, values))
+        except (OSError, ValueError, KeyError, IndexError):
+            return cls.build(chain)
+
+        index.catch_up(chain)
+        return index
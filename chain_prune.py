@@ -0,0 +1,73 @@
+from collections import deque
+
+# Pruned chain for long sessions: only the last keep_blocks blocks stay in memory, plus
+# periodic snapshots of the tip hash and the game state (balances, positions, ...).
+# Older blocks are handed to an archive (anything with append(), e.g. a ChainStore) or
+# dropped, so memory stays flat however long the session runs.
+#
+# PrunedChain is used in place of the list in Blockchain.chain (Blockchain(store=...)).
+# Block indexes stay absolute: len() is the full chain length and first_index is the oldest
+# block that can still be read (0 when the archive is readable), which is all
+# get_last_block / add_block need.
+
+
+class PrunedChain:
+    def __init__(self, keep_blocks=1000, snapshot_every=100, state=None, archive=None, keep_snapshots=10):
+        # state: optional callable state(tip block) returning the game state to store in each
+        # snapshot; it should read the state from the block, so "Hash" and "State" agree
+        self.blocks = deque(maxlen=keep_blocks)
+        self.snapshot_every = snapshot_every
+        self.state = state
+        self.archive = archive
+        self.snapshots = deque(maxlen=keep_snapshots)
+        self.first_in_memory = 0
+        self.length = 0
+
+    def append(self, block):
+        if len(self.blocks) == self.blocks.maxlen:
+            oldest = self.blocks[0]
+            if self.archive is not None:
+                self.archive.append(oldest)
+            self.first_in_memory = oldest.index + 1
+        self.blocks.append(block)
+        self.length += 1
+
+        if self.snapshot_every and self.length % self.snapshot_every == 0:
+            self.take_snapshot()
+
+    def take_snapshot(self):
+        tip = self.blocks[-1]
+        self.snapshots.append({
+            "Index": tip.index,
+            "Hash": tip.hash,
+            "Proof": tip.proof,
+            "State": self.state(tip) if self.state is not None else None,
+        })
+
+    @property
+    def first_index(self):
+        if self.archive is not None and hasattr(self.archive, "__getitem__"):
+            return 0
+        return self.first_in_memory
+
+    def latest_snapshot(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if self.first_in_memory <= index < self.length:
+            return self.blocks[index - self.first_in_memory]
+        if self.first_index <= index < self.first_in_memory:
+            return self.archive[index]
+        raise IndexError(f"block {index} is not available (pruned before {self.first_in_memory})")
+
+    def __iter__(self):
+        # Same blocks as indexing: from first_index, through the archive when it is readable
+        first_in_memory, blocks = self.first_in_memory, list(self.blocks)
+        for index in range(self.first_index, first_in_memory):
+            yield self.archive[index]
+        yield from blocks
@@ -0,0 +1,229 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+from blockchain import Block
+
+# Durable, append-only storage for a Blockchain.
+#
+# Blocks are written to segment files (seg-000000.log, ...) as a fixed-size header followed
+# by the block's encoded payload (codec.py). An offset index (index.bin, 8 bytes per block) and a checkpoint
+# (checkpoint.bin) are written on every group commit. On open, the store trusts everything up
+# to the checkpoint and only scans the segments past it, truncating a torn tail.
+#
+# ChainStore behaves like the list in Blockchain.chain (len, indexing, iteration, append),
+# so Blockchain(store=ChainStore(path)) keeps get_last_block / add_block unchanged.
+#
+# ChainStore(path, read_only=True) reads the blocks that were complete when it was opened and
+# never writes: a torn tail is skipped rather than truncated, so audits and verification can
+# read a store that a running server is still appending to.
+
+MAGIC = b"BLK2"
+# magic, index, timestamp (ns), proof, difficulty, previous hash, hash, payload length, crc32
+HEADER = struct.Struct("<4sQQQB32s32sII")
+CHECKPOINT = struct.Struct("<QQQ")  # block count, segment number, end offset in that segment
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+
+def pack_hash(hex_hash):
+    return bytes.fromhex(hex_hash) if len(hex_hash) == 64 else bytes(32)
+
+
+def unpack_hash(raw, index):
+    # Genesis links to "0" rather than a real hash
+    return "0" if index == 0 and raw == bytes(32) else raw.hex()
+
+
+def encode_block(block):
+    payload = block.payload
+    fields = (MAGIC, block.index, block.timestamp_ns, block.proof, block.difficulty,
+              pack_hash(block.previous_hash), pack_hash(block.hash), len(payload))
+    crc = zlib.crc32(HEADER.pack(*fields, 0) + payload)
+    return HEADER.pack(*fields, crc) + payload
+
+
+def record_block(fields, payload):
+    # Block from a record's header fields; the payload bytes are decoded the first time
+    # block.data is read
+    _, index, timestamp_ns, proof, difficulty, previous_hash, block_hash, _, _ = fields
+    return Block(index, unpack_hash(previous_hash, index), None, None, proof, difficulty,
+                 timestamp_ns=timestamp_ns, block_hash=block_hash, payload=bytes(payload))
+
+
+class ChainStore:
+    def __init__(self, path, fsync_every=1, segment_size=SEGMENT_SIZE, read_only=False):
+        # fsync_every: appends per group commit (1 = every block, 0 = only on flush/close)
+        # read_only: open without recovering or writing anything (see above)
+        self.path = path
+        self.read_only = read_only
+        self.fsync_every = fsync_every
+        self.segment_size = segment_size
+        self.offsets = array("Q")  # (segment << 40) | offset for every block
+        self.unsynced = 0
+        self.maps = {}  # segment number -> mmap of a sealed segment
+        self.last_block = None
+        self.file = self.index_file = None
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        elif not os.path.isdir(path):
+            raise FileNotFoundError(f"no chain store at {path}")
+
+        self.recover()
+        if not read_only:
+            self.file = open(self.segment_path(self.segment), "ab")
+            self.index_file = open(os.path.join(self.path, "index.bin"), "ab")
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, f"seg-{segment:06d}.log")
+
+    def recover(self):
+        count, self.segment, offset = 0, 0, 0
+        checkpoint_path = os.path.join(self.path, "checkpoint.bin")
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "rb") as f:
+                raw = f.read()
+            if len(raw) == CHECKPOINT.size:
+                count, self.segment, offset = CHECKPOINT.unpack(raw)
+
+        # Everything up to the checkpoint is already in the index
+        index_path = os.path.join(self.path, "index.bin")
+        raw = b""
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                raw = f.read(count * 8)
+        if len(raw) == count * 8:
+            self.offsets.frombytes(raw)
+        else:  # index shorter than the checkpoint claims: rescan everything
+            self.segment, offset = 0, 0
+        indexed = len(self.offsets)
+
+        # Scan forward from the checkpoint, stopping at the first bad or torn record
+        while os.path.exists(self.segment_path(self.segment)):
+            with open(self.segment_path(self.segment), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            position = 0
+            while position + HEADER.size <= len(data):
+                fields = HEADER.unpack_from(data, position)
+                end = position + HEADER.size + fields[7]
+                payload = data[position + HEADER.size:end]
+                if fields[0] != MAGIC or fields[1] != len(self.offsets) or len(payload) != fields[7]:
+                    break
+                if zlib.crc32(HEADER.pack(*fields[:8], 0) + payload) != fields[8]:
+                    break
+                self.offsets.append((self.segment << 40) | (offset + position))
+                position = end
+
+            if position < len(data):
+                if not self.read_only:
+                    with open(self.segment_path(self.segment), "ab") as f:
+                        f.truncate(offset + position)
+                offset += position
+                break
+            offset += position
+            if not os.path.exists(self.segment_path(self.segment + 1)):
+                break
+            self.segment, offset = self.segment + 1, 0
+        self.segment_offset = offset
+        if self.read_only:
+            return
+
+        # Add anything found past the checkpoint to the index
+        with open(index_path, "ab") as f:
+            f.truncate(indexed * 8)
+            f.write(self.offsets[indexed:].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.write_checkpoint()
+
+    def write_checkpoint(self):
+        tmp_path = os.path.join(self.path, "checkpoint.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(CHECKPOINT.pack(len(self.offsets), self.segment, self.segment_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, "checkpoint.bin"))
+
+    def append(self, block):
+        if self.read_only:
+            raise OSError("chain store is open read-only")
+        record = encode_block(block)
+        if self.segment_offset and self.segment_offset + len(record) > self.segment_size:
+            self.roll_segment()
+        self.file.write(record)
+        self.offsets.append((self.segment << 40) | self.segment_offset)
+        self.index_file.write(self.offsets[-1:].tobytes())
+        self.segment_offset += len(record)
+        self.last_block = block
+
+        self.unsynced += 1
+        if self.fsync_every and self.unsynced >= self.fsync_every:
+            self.flush()
+
+    def roll_segment(self):
+        self.flush()
+        self.file.close()
+        self.segment += 1
+        self.segment_offset = 0
+        self.file = open(self.segment_path(self.segment), "ab")
+
+    def flush(self):
+        # Group commit: make every appended block durable, then move the checkpoint
+        if self.read_only:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.index_file.flush()
+        os.fsync(self.index_file.fileno())
+        self.write_checkpoint()
+        self.unsynced = 0
+
+    def read_record(self, segment, offset):
+        if segment == self.segment and not self.read_only:
+            self.file.flush()
+            with open(self.segment_path(segment), "rb") as f:
+                header = os.pread(f.fileno(), HEADER.size, offset)
+                fields = HEADER.unpack(header)
+                payload = os.pread(f.fileno(), fields[7], offset + HEADER.size)
+            return fields, payload
+
+        # Sealed segments never change, so they are memory-mapped once; a read-only store only
+        # reads what was complete when it was opened, so its last segment is mapped too
+        if segment not in self.maps:
+            with open(self.segment_path(segment), "rb") as f:
+                self.maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.maps[segment]
+        fields = HEADER.unpack_from(data, offset)
+        return fields, data[offset + HEADER.size:offset + HEADER.size + fields[7]]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.offsets)
+        if not 0 <= index < len(self.offsets):
+            raise IndexError("block index out of range")
+        if self.last_block is not None and index == self.last_block.index:
+            return self.last_block
+
+        location = self.offsets[index]
+        block = record_block(*self.read_record(location >> 40, location & ((1 << 40) - 1)))
+        if index == len(self.offsets) - 1:
+            self.last_block = block
+        return block
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        for index in range(len(self.offsets)):
+            yield self[index]
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.index_file.close()
+        for data in self.maps.values():
+            data.close()
+        self.maps = {}
@@ -0,0 +1,128 @@
+import hashlib
+import hmac
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from blockchain import pack_blocks, unpack_blocks, valid_proof
+from chain_store import ChainStore
+
+# Full-chain verification: every block's hash is recomputed, every previous_hash link and
+# index is checked, and every proof is checked against the previous proof at the difficulty
+# stored in the block. Large chains are split into segments verified in worker processes;
+# each segment also receives the block before it, so the links between segments are checked too.
+# Workers read their own blocks: a ChainStore is opened read-only in each worker, and an
+# in-memory chain is sent as one bytes object per segment (blockchain.pack_blocks) rather than
+# pickled Block objects, which cost the main process more than a serial verification.
+#
+# A CheckpointLog records HMAC-signed (index, hash) pairs of chains that verified, so the
+# next verification only has to cover blocks added after the last checkpoint.
+
+SEGMENT_BLOCKS = 50000
+
+
+def verify_blocks(blocks, first_checked):
+    # blocks[0] is only used as the link for blocks[1]; returns the first bad index or None
+    previous = None
+    for block in blocks:
+        if block.index < first_checked:
+            previous = block
+            continue
+        if block.hash != block.hash_block():
+            return block.index
+        if previous is None:
+            if block.index != 0 or block.previous_hash != "0":
+                return block.index
+        elif (block.index != previous.index + 1 or block.previous_hash != previous.hash
+              or not valid_proof(previous.proof, block.proof, block.difficulty)):
+            return block.index
+        previous = block
+    return None
+
+
+def verify_segment(source, first, checked, stop):
+    # source: path of a ChainStore, or blocks first..stop-1 from pack_blocks
+    if isinstance(source, str):
+        store = ChainStore(source, read_only=True)
+        try:
+            return verify_blocks([store[i] for i in range(first, stop)], checked)
+        finally:
+            store.close()
+    return verify_blocks(unpack_blocks(source), checked)
+
+
+def segment_source(chain, first, stop):
+    if isinstance(chain, ChainStore):
+        return chain.path
+    return pack_blocks(chain[i] for i in range(first, stop))
+
+
+def verify_chain(blockchain, workers=1, checkpoints=None, start=0):
+    # Returns the index of the first bad block, or None if the chain (from `start`) is valid.
+    # checkpoints: optional CheckpointLog; verification resumes after its latest valid entry,
+    # and a new checkpoint is recorded for the tip when everything checks out.
+    chain = blockchain.chain
+    if checkpoints is not None:
+        start = max(start, checkpoints.resume_index(chain))
+    # A pruned chain (chain_prune.py) is checked from its oldest available block, which
+    # serves as the anchor in place of genesis
+    first_available = getattr(chain, "first_index", 0)
+    if first_available > 0 and start <= first_available:
+        start = first_available + 1
+    if start >= len(chain):
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    segments = [(max(i - 1, 0), i, min(i + SEGMENT_BLOCKS, len(chain))) for i in range(start, len(chain), SEGMENT_BLOCKS)]
+
+    if workers <= 1 or len(segments) == 1:
+        bad = None
+        for first, checked, stop in segments:
+            bad = verify_blocks([chain[i] for i in range(first, stop)], checked)
+            if bad is not None:
+                break
+    else:
+        if isinstance(chain, ChainStore):
+            chain.flush()  # So the workers see every appended block
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(verify_segment, segment_source(chain, first, stop), first, checked, stop)
+                       for first, checked, stop in segments]
+            results = [f.result() for f in futures]
+        bad = min((r for r in results if r is not None), default=None)
+
+    if bad is None and checkpoints is not None:
+        checkpoints.record(chain[-1])
+    return bad
+
+
+class CheckpointLog:
+    def __init__(self, path, key):
+        # key: secret bytes used to sign the checkpoints
+        self.path = path
+        self.key = key
+
+    def sign(self, index, block_hash):
+        return hmac.new(self.key, f"{index}:{block_hash}".encode(), hashlib.sha256).hexdigest()
+
+    def record(self, block):
+        with open(self.path, "a") as f:
+            f.write(f"{block.index} {block.hash} {self.sign(block.index, block.hash)}\n")
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0].isdigit():
+                    entries.append((int(parts[0]), parts[1], parts[2]))
+        return entries
+
+    def resume_index(self, chain):
+        # First index after the newest checkpoint that is correctly signed and still on the chain
+        for index, block_hash, signature in reversed(self.entries()):
+            if not hmac.compare_digest(signature, self.sign(index, block_hash)):
+                continue
+            if index < len(chain) and chain[index].hash == block_hash:
+                return index + 1
+        return 0
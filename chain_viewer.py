@@ -0,0 +1,168 @@
+import time
+from collections import OrderedDict
+
+import codec
+from lazy_import import lazy_import
+
+# tkinter loads on first use, so importing a game module stays headless
+tk = lazy_import("tkinter")
+tkfont = lazy_import("tkinter.font")
+
+# Virtualized blockchain viewer: only the rows that fit in the window are drawn, and rows are
+# formatted a page at a time the first time they scroll into view. Works the same for a plain
+# list of blocks and an on-disk ChainStore, so opening and scrolling cost the same for 100
+# blocks or 10 million.
+
+PAGE_SIZE = 256
+CACHED_PAGES = 64
+SEARCH_STEP = 5000  # Blocks scanned per Tk callback while searching
+
+
+class ChainViewer:
+    def __init__(self, root, chain, title="Blockchain Records", on_close=None):
+        self.chain = chain
+        self.on_close = on_close
+        self.first = getattr(chain, "first_index", 0)  # Oldest available block (pruned chains start later)
+        self.top = self.first  # Index of the first visible block
+        self.rows = 20
+        self.pages = OrderedDict()  # page number -> (first index on the page, formatted rows)
+        self.search_job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("900x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Jump-to-index and search bar
+        bar = tk.Frame(self.window)
+        bar.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(bar, text="Block:", font=("Helvetica", 12)).pack(side=tk.LEFT)
+        self.index_entry = tk.Entry(bar, width=10, font=("Helvetica", 12))
+        self.index_entry.pack(side=tk.LEFT)
+        self.index_entry.bind("<Return>", lambda event: self.jump())
+        tk.Button(bar, text="Go", command=self.jump, font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
+
+        tk.Label(bar, text="Search:", font=("Helvetica", 12)).pack(side=tk.LEFT, padx=(20, 0))
+        self.search_entry = tk.Entry(bar, width=30, font=("Helvetica", 12))
+        self.search_entry.pack(side=tk.LEFT)
+        self.search_entry.bind("<Return>", lambda event: self.search())
+        tk.Button(bar, text="Find Next", command=self.search, font=("Helvetica", 12)).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(bar, text="", font=("Helvetica", 12))
+        self.status_label.pack(side=tk.RIGHT)
+
+        # Rows and a scrollbar that maps to block indexes, not to drawn lines
+        body = tk.Frame(self.window)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(body, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(body, font=("Courier", 10), activestyle="none")
+        self.line_height = tkfont.Font(font=("Courier", 10)).metrics("linespace") + 1
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.listbox.bind("<Configure>", self.on_resize)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll_to(self.top - event.delta // 120 * 3))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_to(self.top - 3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_to(self.top + 3))
+        self.listbox.bind("<Prior>", lambda event: self.scroll_to(self.top - self.rows))
+        self.listbox.bind("<Next>", lambda event: self.scroll_to(self.top + self.rows))
+
+        tk.Button(self.window, text="Close", command=self.close, font=("Helvetica", 12)).pack(pady=5)
+        self.render()
+
+        # Modal: the game window stays inert while the chain is being browsed
+        self.window.grab_set()
+
+    def format_block(self, block):
+        data = codec.decode(block.payload)
+        return f"{block.index:>8} | {time.ctime(block.timestamp)} | proof {block.proof} | {block.hash[:16]}... | {data}"
+
+    def row(self, index):
+        page_number = index // PAGE_SIZE
+        page = self.pages.get(page_number)
+        if page is None:
+            # A pruned chain's first readable block can fall inside a page
+            start = max(page_number * PAGE_SIZE, getattr(self.chain, "first_index", 0))
+            stop = min(page_number * PAGE_SIZE + PAGE_SIZE, len(self.chain))
+            page = (start, [self.format_block(self.chain[i]) for i in range(start, stop)])
+            self.pages[page_number] = page
+            if len(self.pages) > CACHED_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page_number)
+        start, rows = page
+        return rows[index - start]
+
+    def render(self, highlight=None):
+        total = len(self.chain)
+        stop = min(self.top + self.rows, total)
+        self.listbox.delete(0, tk.END)
+        for index in range(self.top, stop):
+            self.listbox.insert(tk.END, self.row(index))
+        if highlight is not None and self.top <= highlight < stop:
+            self.listbox.selection_set(highlight - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, stop / total)
+        if self.search_job is None:
+            self.status_label.config(text=f"Blocks {self.top}-{max(stop - 1, 0)} of {total}")
+
+    def scroll_to(self, top, highlight=None):
+        self.first = getattr(self.chain, "first_index", 0)
+        self.top = max(self.first, min(top, len(self.chain) - self.rows))
+        self.render(highlight)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.chain)))
+        elif unit == "pages":
+            self.scroll_to(self.top + int(amount) * self.rows)
+        else:
+            self.scroll_to(self.top + int(amount))
+
+    def on_resize(self, event):
+        rows = max(event.height // self.line_height, 1)
+        if rows != self.rows:
+            self.rows = rows
+            self.scroll_to(self.top)
+
+    def jump(self):
+        try:
+            index = int(self.index_entry.get())
+        except ValueError:
+            self.status_label.config(text="Enter a block number")
+            return
+        index = max(self.first, min(index, len(self.chain) - 1))
+        self.scroll_to(index, highlight=index)
+
+    def search(self):
+        # Scan forward from the block after the current selection, a step at a time, so the
+        # window keeps responding on long chains
+        text = self.search_entry.get()
+        if not text:
+            return
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        selection = self.listbox.curselection()
+        start = self.top + (selection[0] + 1 if selection else 0)
+        self.search_step(text, start, start)
+
+    def search_step(self, text, position, start):
+        total = len(self.chain)
+        stop = min(position + SEARCH_STEP, total)
+        for index in range(position, stop):
+            if text in self.row(index):
+                self.search_job = None
+                self.scroll_to(index, highlight=index)
+                return
+        if stop >= total:
+            self.search_job = None
+            self.status_label.config(text=f"No match for {text!r} after block {start}")
+            return
+        self.status_label.config(text=f"Searching... block {stop} of {total}")
+        self.search_job = self.window.after(1, self.search_step, text, stop, start)
+
+    def close(self):
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.window.destroy()
+        if self.on_close is not None:
+            self.on_close()
@@ -0,0 +1,138 @@
+import struct
+
+# Canonical binary encoding for block payloads.
+#
+# Every value is a one-byte tag followed by a fixed-size or length-prefixed body, so field
+# boundaries are never ambiguous. Dict entries are sorted by their encoded key, so equal
+# values always encode to the same bytes. The same bytes are hashed (Block), written to disk
+# (ChainStore) and sent over the network.
+#
+#   N            None
+#   T / F        True / False
+#   i <u8 n> ..  int, n bytes of signed big-endian two's complement
+#   f <8>        float, big-endian IEEE 754 double
+#   s <u32 n> .. str, UTF-8
+#   b <u32 n> .. bytes
+#   l <u32 n> .. list or tuple of n values
+#   d <u32 n> .. dict of n key/value pairs
+#
+# Corrupt or truncated input always raises ValueError.
+
+U32 = struct.Struct(">I")
+DOUBLE = struct.Struct(">d")
+unpack_u32 = U32.unpack_from
+SHORT_STRING = 32  # Strings up to this many bytes are memoized by decode
+STRING_CACHE = 4096  # Most memoized strings
+strings = {}  # encoded bytes -> str
+
+
+def encode(value):
+    out = bytearray()
+    encode_into(value, out)
+    return bytes(out)
+
+
+def encode_into(value, out):
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int):
+        raw = value.to_bytes((value.bit_length() + 8) // 8, "big", signed=True)
+        out += b"i"
+        out.append(len(raw))
+        out += raw
+    elif isinstance(value, float):
+        out += b"f"
+        out += DOUBLE.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode()
+        out += b"s"
+        out += U32.pack(len(raw))
+        out += raw
+    elif isinstance(value, (bytes, bytearray)):
+        out += b"b"
+        out += U32.pack(len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += b"l"
+        out += U32.pack(len(value))
+        for item in value:
+            encode_into(item, out)
+    elif isinstance(value, dict):
+        out += b"d"
+        out += U32.pack(len(value))
+        for key, item in sorted((encode(k), v) for k, v in value.items()):
+            out += key
+            encode_into(item, out)
+    else:
+        raise TypeError(f"cannot encode {type(value).__name__}")
+
+
+def decode(data):
+    try:
+        value, end = decode_from(data, 0)
+    except (IndexError, struct.error) as e:  # A tag, length or float cut off
+        raise ValueError("truncated encoded value") from e
+    if end != len(data):
+        raise ValueError("trailing bytes after encoded value")
+    return value
+
+
+def decode_from(data, pos):
+    # Returns (value, position after it). Tags are tested most frequent first, and short
+    # strings (dict keys, symbols, outcomes) are decoded once and then looked up.
+    tag = data[pos]
+    pos += 1
+    if tag == 115:  # s
+        size = unpack_u32(data, pos)[0]
+        end = pos + 4 + size
+        raw = bytes(data[pos + 4:end])
+        if len(raw) != size:  # Before the cache, which may hold a prefix of the cut string
+            raise ValueError("truncated encoded value")
+        value = strings.get(raw)
+        if value is None:
+            value = raw.decode()
+            if size <= SHORT_STRING and len(strings) < STRING_CACHE:
+                strings[raw] = value
+        return value, end
+    if tag == 100:  # d
+        count = unpack_u32(data, pos)[0]
+        pos += 4
+        result = {}
+        for _ in range(count):
+            key, pos = decode_from(data, pos)
+            result[key], pos = decode_from(data, pos)
+        return result, pos
+    if tag == 105:  # i
+        size = data[pos]
+        raw = data[pos + 1:pos + 1 + size]
+        if len(raw) != size:
+            raise ValueError("truncated encoded value")
+        return int.from_bytes(raw, "big", signed=True), pos + 1 + size
+    if tag == 108:  # l
+        count = unpack_u32(data, pos)[0]
+        pos += 4
+        items = []
+        append = items.append
+        for _ in range(count):
+            item, pos = decode_from(data, pos)
+            append(item)
+        return items, pos
+    if tag == 78:  # N
+        return None, pos
+    if tag == 84:  # T
+        return True, pos
+    if tag == 70:  # F
+        return False, pos
+    if tag == 102:  # f
+        return DOUBLE.unpack_from(data, pos)[0], pos + 8
+    if tag == 98:  # b
+        size = unpack_u32(data, pos)[0]
+        raw = bytes(data[pos + 4:pos + 4 + size])
+        if len(raw) != size:
+            raise ValueError("truncated encoded value")
+        return raw, pos + 4 + size
+    raise ValueError(f"unknown tag {tag!r} at offset {pos - 1}")
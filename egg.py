@@ -1,66 +1,39 @@
-import tkinter as tk
-import random
-import time
-import hashlib
-from tkinter import messagebox
-
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
-
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from chain_export import export_chain, chain_summary
+from chain_viewer import ChainViewer
+from mempool import Mempool
+from hash_rng import SYSTEM, GameSeed
+
+# tkinter loads on first use, so EggGame can be used headless
+tk = lazy_import("tkinter")
 
 class EggGame:
     ANIMALS = ["Cat", "Dog", "Bird", "Fish", "Lizard", "Horse", "Rabbit", "Elephant", "Tiger", "Lion"]
 
-    def __init__(self):
-        self.blockchain = Blockchain()
+    def __init__(self, blockchain=None, submit=None, rng=SYSTEM):
+        # submit: optional callable that takes the record instead of mining it here
+        # (game_server.py passes the shared chain's submit)
+        # rng: a hash_rng.HashRNG for eggs that can be reproduced from the chain
+        self.rng = rng
+        self.blockchain = blockchain if blockchain is not None else Blockchain(cache=ProofCache())
+        self.submit = submit
         self.collection = []
 
     def break_egg(self):
         # Generate random number between 0 and 99
-        num = random.randint(0, 99)
+        num = self.rng.randbelow(100)
         animal_type = self.ANIMALS[num % 10]  # Unit digit defines animal type
         animal_tier = num // 10  # Dozens digit defines animal tier
 
         animal = {"type": animal_type, "tier": animal_tier}
         self.collection.append(animal)
 
+        if self.submit is not None:
+            self.submit(animal)
+            return animal
+
         # Add the animal to the blockchain
         last_proof = self.blockchain.get_last_block().proof
         proof = self.blockchain.proof_of_work(last_proof)
@@ -69,16 +42,23 @@ class EggGame:
         return animal
 
     def get_blockchain(self):
-        blockchain_data = ""
-        for block in self.blockchain.chain:
-            blockchain_data += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
-        return blockchain_data
+        # Only the latest blocks; the full chain goes through export_chain
+        return chain_summary(self.blockchain.chain)
 
 class EggGameGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Egg Breaking Game")
         self.game = EggGame()
+        # Eggs come from a HashRNG tied to the chain, so replay.py can re-make them
+        self.seed = GameSeed(self.game.blockchain, "Egg")
+        self.game.rng = self.seed.rng
+        self.round_fields = {}
+        # Eggs are recorded through a mempool and sealed every couple of seconds, so breaking
+        # an egg never waits on proof_of_work
+        self.mempool = Mempool(self.game.blockchain, interval=2.0)
+        self.game.submit = self.record
+        self.record(self.seed.commitment())
 
         # Set up UI
         self.label = tk.Label(root, text="Click 'Break Egg' to get an animal!", font=("Helvetica", 18))
@@ -96,7 +76,17 @@ class EggGameGUI:
         self.quit_button = tk.Button(root, text="Quit", command=self.quit_game, font=("Helvetica", 18))
         self.quit_button.pack(pady=10)
 
+    def record(self, record):
+        future = self.mempool.submit(dict(record, **self.round_fields))
+        future.add_done_callback(self.sealed)
+
+    def sealed(self, future):
+        # Runs on the mempool thread once the record's block is on the chain
+        if future.exception() is None:
+            self.seed.on_sealed(self.game.blockchain.chain[future.result()[0]])
+
     def break_egg(self):
+        self.round_fields = self.seed.begin_round()
         animal = self.game.break_egg()
         result_text = f"Animal: {animal['type']} (Tier {animal['tier']})"
         self.result_label.config(text=result_text)
@@ -108,12 +98,13 @@ class EggGameGUI:
         self.result_label.config(text=collection_text)
 
     def quit_game(self):
-        # Display the blockchain information
-        blockchain_data = self.game.get_blockchain()
-        messagebox.showinfo("Blockchain", blockchain_data)
-
-        # Quit the game
-        self.root.quit()
+        if not self.mempool.closed:
+            self.round_fields = {}
+            self.record(self.seed.reveal())
+        self.mempool.close()  # Seal the eggs and the reveal still pending
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits the game)
+        export_chain(self.game.blockchain.chain, "egg_blockchain.jsonl")
+        ChainViewer(self.root, self.game.blockchain.chain, on_close=self.root.quit)
 
 if __name__ == "__main__":
     root = tk.Tk()
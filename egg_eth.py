@@ -1,53 +1,26 @@
-import tkinter as tk
-import hashlib
-import time
 import secrets
-from tkinter import messagebox
-from web3 import Web3
-
-# Initialize Web3 connection to Ganache
-w3 = Web3(Web3.HTTPProvider("http://127.0.0.1:7545"))
-
-class Block:
-    def __init__(self, index, previous_hash, timestamp, data, proof):
-        self.index = index
-        self.previous_hash = previous_hash
-        self.timestamp = timestamp
-        self.data = data
-        self.proof = proof
-        self.hash = self.hash_block()
-
-    def hash_block(self):
-        block_string = f"{self.index}{self.previous_hash}{self.timestamp}{self.data}{self.proof}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-class Blockchain:
-    def __init__(self):
-        self.chain = []
-        self.create_genesis_block()
-
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", time.time(), "Genesis Block", 100)
-        self.chain.append(genesis_block)
-
-    def get_last_block(self):
-        return self.chain[-1]
-
-    def add_block(self, data, proof):
-        last_block = self.get_last_block()
-        new_block = Block(len(self.chain), last_block.hash, time.time(), data, proof)
-        self.chain.append(new_block)
-
-    def proof_of_work(self, last_proof):
-        proof = 0
-        while not self.is_valid_proof(last_proof, proof):
-            proof += 1
-        return proof
-
-    def is_valid_proof(self, last_proof, proof):
-        guess = f"{last_proof}{proof}".encode()
-        guess_hash = hashlib.sha256(guess).hexdigest()
-        return guess_hash[:4] == "0000"
+import time
+from lazy_import import lazy_import
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from block_worker import BlockWorker
+from chain_export import export_chain
+from chain_viewer import ChainViewer
+import metrics
+
+# GUI and web3 modules load on first use, so EggGame can be used headless
+tk = lazy_import("tkinter")
+messagebox = lazy_import("tkinter.messagebox")
+web3_module = lazy_import("web3")
+w3 = None
+
+
+def get_w3():
+    # Initialize Web3 connection to Ganache on first use
+    global w3
+    if w3 is None:
+        w3 = web3_module.Web3(web3_module.Web3.HTTPProvider("http://127.0.0.1:7545"))
+    return w3
 
 class EggGame:
     ANIMAL_TYPES = ["Cat", "Dog", "Elephant", "Tiger", "Lion", "Bird", "Fish", "Horse", "Rabbit", "Bear"]
@@ -86,7 +59,7 @@ class LoginWindow:
 
     def login(self):
         account_address = self.account_entry.get()
-        if account_address and w3.is_address(account_address):
+        if account_address and get_w3().is_address(account_address):
             self.root.destroy()
             main_game_window(account_address)
         else:
@@ -94,13 +67,14 @@ class LoginWindow:
 
 class EggGameGUI:
     def __init__(self, root, account_address):
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(cache=ProofCache())
         self.egg_game = EggGame()
         self.account_address = account_address
         self.host_address = "0x84488CcDAe6ABCF8A7cB269bd5dB873A0f968326"
 
         self.root = root
         self.root.title("Blockchain Egg Game")
+        self.block_worker = BlockWorker(self.blockchain, self.root)
         self.root.geometry("400x300")
 
         self.eggs_label = tk.Label(self.root, text="Eggs: 0", font=("Helvetica", 14))
@@ -132,11 +106,16 @@ class EggGameGUI:
             tx = {
                 'from': self.account_address,
                 'to': self.host_address,
-                'value': w3.to_wei(0.1, 'ether'),
+                'value': get_w3().to_wei(0.1, 'ether'),
                 'gas': 2000000,
-                'gasPrice': w3.to_wei('50', 'gwei')
+                'gasPrice': get_w3().to_wei('50', 'gwei')
             }
-            w3.eth.send_transaction(tx)
+            timing = metrics.enabled
+            if timing:
+                start = time.perf_counter_ns()
+            get_w3().eth.send_transaction(tx)
+            if timing:
+                metrics.observe("transaction", start)
             self.egg_game.buy_eggs(10)
             self.eggs_label.config(text=f"Eggs: {self.egg_game.eggs}")
             self.update_egg_button_state()
@@ -153,18 +132,17 @@ class EggGameGUI:
             self.update_egg_button_state()
 
     def record_blockchain(self, animal_info):
-        last_proof = self.blockchain.get_last_block().proof
-        proof = self.blockchain.proof_of_work(last_proof)
+        # Mined in the background so the window stays responsive
         data = {"Animal": animal_info, "Player": self.account_address}
-        self.blockchain.add_block(data, proof)
+        self.block_worker.submit(data)
 
     def quit_game(self):
-        blockchain_info = "\nBlockchain:\n"
-        for block in self.blockchain.chain:
-            blockchain_info += f"Index: {block.index}, Hash: {block.hash}, Data: {block.data}\n"
+        # Wait for queued records to be mined before showing the chain
+        self.block_worker.close()
 
-        messagebox.showinfo("Blockchain", blockchain_info)
-        self.root.quit()
+        # Stream the full chain to a file, then browse it in the viewer (closing it quits)
+        export_chain(self.blockchain.chain, "egg_eth_blockchain.jsonl")
+        ChainViewer(self.root, self.blockchain.chain, on_close=self.root.quit)
 
 def main_game_window(account_address):
     root = tk.Tk()
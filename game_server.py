@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+
+from blockchain import Blockchain
+from proof_cache import ProofCache
+from mempool import Mempool, RateLimitExceeded, INTERVAL, MAX_RECORDS
+from chain_store import ChainStore
+from Slot import SlotMachine
+from blackjack import BlackjackGame
+from Racing_blockchain import HorseRace
+from Russian_Roulette import RussianRoulette
+from egg import EggGame
+from hash_rng import session_rng
+import metrics
+
+# Multi-session game server: many players run the headless game engines over TCP, and every
+# session records its events on one shared chain. Records go through a Mempool that seals them
+# into Merkle blocks on a fixed interval, so mining cost is paid once per block instead of once
+# per event and no player waits on a proof unless they ask to.
+#
+# Protocol: one JSON object per line in each direction. A connection is one session.
+#   {"op": "start", "game": "slot", "player": "alice"}   -> {"ok": true, "session": "3f9c...", ...}
+#   {"op": "spin"}                                      -> {"ok": true, "Outcome": "Win", ...}
+#   {"op": "spin", "wait": true}                        -> ... plus "Blocks": [[index, position]]
+#   {"op": "quit"}
+# Errors (including rate limiting) come back as {"ok": false, "error": "..."}.
+# See GAMES below for each game's ops.
+
+HOST = "127.0.0.1"
+PORT = 8765
+SESSION_ID_LENGTH = 16  # Hex digits of the seed commitment used as the session id
+
+
+class Session:
+    game = None
+
+    def __init__(self, server, player):
+        self.server = server
+        self.player = player
+        self.events = 0
+        self.over = False
+        # Outcomes come from a HashRNG keyed by a session seed and the chain tip at start
+        self.seed, self.tip, self.rng = session_rng(server.blockchain)
+        # The id is a prefix of the seed commitment, so it stays unique across server runs that
+        # share a store, and replay can check the revealed seed against it
+        self.id = self.commitment()[:SESSION_ID_LENGTH]
+
+    def play(self, op, request):
+        # Returns (reply, records) where records go on the shared chain
+        action = self.actions.get(op)
+        if action is None:
+            raise ValueError(f"unknown op {op!r} for {self.game}")
+        if self.over:
+            raise ValueError("game over, start a new session")
+        return action(self, request)
+
+    def state(self):
+        return {}
+
+    def commitment(self):
+        # Published at start; the seed itself stays on the server until the session ends
+        return hashlib.sha256(self.seed).hexdigest()
+
+    def reveal(self):
+        # Recorded when the session ends, so replay.py can re-draw every outcome
+        return {"Reveal": self.seed.hex(), "Chain Tip": self.tip.hex()}
+
+
+class SlotSession(Session):
+    game = "Slot Machine"
+
+    def __init__(self, server, player):
+        super().__init__(server, player)
+        self.engine = SlotMachine(rng=self.rng)
+        self.balance = 100
+
+    def spin(self, request):
+        ids = self.engine.spin_ids()
+        outcome, amount = self.engine.evaluate_ids(ids)
+        spin_result = self.engine.symbols(ids)
+        self.balance += amount
+        self.over = self.balance <= 0
+        record = {
+            "Spin Result": spin_result,
+            "Outcome": outcome,
+            "Amount": amount,
+            "Balance After Spin": self.balance,
+        }
+        return dict(record, **{"Game Over": self.over}), [record]
+
+    def state(self):
+        return {"Balance": self.balance}
+
+    actions = {"spin": spin}
+
+
+class BlackjackSession(Session):
+    game = "Blackjack"
+
+    def __init__(self, server, player):
+        super().__init__(server, player)
+        self.engine = BlackjackGame(blockchain=server.blockchain, rng=self.rng)
+        self.in_hand = False
+
+    def hands(self, reveal_dealer=False):
+        dealer_hand = self.engine.dealer_hand if reveal_dealer else self.engine.dealer_hand[:1]
+        return {"Player Hand": self.engine.player_hand, "Dealer Hand": dealer_hand,
+                "Player Total": self.engine.calculate_hand_value(self.engine.player_hand)}
+
+    def finish(self, result):
+        self.in_hand = False
+        record = {"Player Hand": self.engine.player_hand, "Dealer Hand": self.engine.dealer_hand, "Result": result}
+        return dict(self.hands(reveal_dealer=True), Result=result), [record]
+
+    def deal(self, request):
+        self.engine.new_game()
+        self.in_hand = True
+        return self.hands(), []
+
+    def hit(self, request):
+        if not self.in_hand:
+            raise ValueError("deal first")
+        self.engine.deal_card(self.engine.player_hand)
+        if self.engine.calculate_hand_value(self.engine.player_hand) > 21:
+            return self.finish("Player Busts")
+        return self.hands(), []
+
+    def stand(self, request):
+        if not self.in_hand:
+            raise ValueError("deal first")
+        self.engine.play_dealer()
+        return self.finish(self.engine.check_winner()[0])
+
+    actions = {"deal": deal, "hit": hit, "stand": stand}
+
+
+class RaceSession(Session):
+    game = "Horse Race"
+    STEPS_TO_WIN = 200
+
+    def __init__(self, server, player):
+        super().__init__(server, player)
+        self.engine = HorseRace(rng=self.rng)
+        self.player_positions = [0, 0, 0]
+
+    def step(self, request):
+        spin_result = self.engine.spin()
+        winner = None
+        for i in range(3):
+            self.player_positions[i] += spin_result[i]
+            if winner is None and self.player_positions[i] >= self.STEPS_TO_WIN:
+                winner = i + 1
+        self.over = winner is not None
+        record = {"Spin Result": spin_result, "Player Positions": self.player_positions.copy()}
+        return dict(record, Winner=winner), [record]
+
+    def state(self):
+        return {"Player Positions": self.player_positions}
+
+    actions = {"step": step}
+
+
+class RouletteSession(Session):
+    game = "Russian Roulette"
+
+    def __init__(self, server, player):
+        super().__init__(server, player)
+        self.engine = RussianRoulette(rng=self.rng)
+        self.lives = {"Player 1": 1, "Player 2": 1}
+
+    def fire(self, request):
+        reply = {}
+        records = []
+        for shooter, gun in (("Player 1", self.engine.gun1_chambers), ("Player 2", self.engine.gun2_chambers)):
+            chamber, bullet_fired = self.engine.pull_trigger(gun)
+            outcome = "Lost" if bullet_fired else "Survived"
+            record = {
+                "Shooter": shooter,
+                "Gun": 1 if shooter == "Player 1" else 2,
+                "Chamber Fired": chamber,
+                "Bullet Location": gun,
+                "Outcome": outcome,
+                "Lives Before Spin": self.lives[shooter],
+            }
+            if bullet_fired:
+                self.lives[shooter] -= 1
+                record["Lives After Spin"] = self.lives[shooter]
+            records.append(record)
+            reply[shooter] = {"Chamber Fired": chamber, "Outcome": outcome}
+            if self.lives[shooter] <= 0:
+                self.over = True
+                break  # Same as the GUI: the game ends before the other gun fires
+        reply["Lives"] = self.lives
+        reply["Game Over"] = self.over
+        return reply, records
+
+    def state(self):
+        return {"Lives": self.lives}
+
+    actions = {"fire": fire}
+
+
+class EggSession(Session):
+    game = "Egg"
+
+    def __init__(self, server, player):
+        super().__init__(server, player)
+        self.records = []
+        self.engine = EggGame(blockchain=server.blockchain, submit=self.records.append, rng=self.rng)
+
+    def break_egg(self, request):
+        animal = self.engine.break_egg()
+        records = self.records[:]
+        self.records.clear()
+        return dict(animal), records
+
+    def collection(self, request):
+        return {"Collection": self.engine.collection}, []
+
+    actions = {"break": break_egg, "collection": collection}
+
+
+GAMES = {
+    "slot": SlotSession,
+    "blackjack": BlackjackSession,
+    "race": RaceSession,
+    "roulette": RouletteSession,
+    "egg": EggSession,
+}
+
+
+class GameServer:
+    def __init__(self, blockchain, host=HOST, port=PORT, mempool=None):
+        self.blockchain = blockchain
+        self.host = host
+        self.port = port
+        self.mempool = mempool if mempool is not None else Mempool(blockchain)
+        self.sessions = 0
+        self.events = 0
+        self.server = None
+
+    def record(self, session, record):
+        # Queue a record for the shared chain; the future resolves to (block index, position).
+        # Session and event numbers keep equal records from different plays distinct.
+        session.events += 1
+        self.events += 1
+        record = dict(record, Player=session.player, Game=session.game, Session=session.id, Event=session.events)
+        return asyncio.wrap_future(self.mempool.submit(record))
+
+    def end(self, session):
+        if session is not None and session.events and not self.mempool.closed:
+            self.record(session, session.reveal())
+
+    async def handle(self, reader, writer):
+        session = None
+        self.sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                    op = request.get("op")
+                    if op == "quit":
+                        break
+                    if op == "start":
+                        game = GAMES.get(request.get("game"))
+                        if game is None:
+                            raise ValueError(f"unknown game {request.get('game')!r}, expected one of {sorted(GAMES)}")
+                        self.end(session)
+                        session = game(self, str(request.get("player", "anonymous")))
+                        reply = {"session": session.id, "game": session.game, "Seed Hash": session.commitment(),
+                                 **session.state()}
+                    elif session is None:
+                        raise ValueError("start a game first")
+                    else:
+                        self.mempool.admit(session.player)  # Per-player request rate limit
+                        timing = metrics.enabled
+                        if timing:
+                            start = time.perf_counter_ns()
+                        reply, records = session.play(op, request)
+                        if timing:
+                            metrics.observe(session.game.lower().replace(" ", "_"), start)
+                        futures = [self.record(session, record) for record in records]
+                        if request.get("wait") and futures:
+                            reply["Blocks"] = [list(sealed) for sealed in await asyncio.gather(*futures)]
+                    reply["ok"] = True
+                except (ValueError, RateLimitExceeded) as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.end(session)
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=4096)
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # Seal whatever is still pending before the chain is closed
+        await asyncio.to_thread(self.mempool.close)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the games to many players over one shared chain")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--store", help="directory for an on-disk ChainStore (default: in memory)")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between blocks")
+    parser.add_argument("--max-records", type=int, default=MAX_RECORDS, help="records that seal a block early")
+    parser.add_argument("--ordering", choices=["fifo", "priority"], default="fifo")
+    parser.add_argument("--rate", type=float, help="requests per second allowed per player")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.enable()
+        metrics.serve(args.metrics_port)
+
+    store = ChainStore(args.store) if args.store else None
+    blockchain = Blockchain(cache=ProofCache(), store=store)
+    mempool = Mempool(blockchain, args.interval, args.max_records, args.ordering, rate=args.rate)
+    server = GameServer(blockchain, args.host, args.port, mempool)
+    print(f"Serving {', '.join(GAMES)} on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mempool.close()
+        blockchain.close()
+        if store is not None:
+            store.close()
+        print(f"{len(blockchain.chain)} blocks on the shared chain")
+
+
+if __name__ == "__main__":
+    main()
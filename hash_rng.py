@@ -0,0 +1,170 @@
+import hashlib
+import random
+import secrets
+from functools import lru_cache
+
+# Deterministic outcome streams derived from the chain: a HashRNG is keyed by a per-session
+# seed plus a block hash, and expands that key with SHAKE-256 into EXPANSION bytes at a time
+# (thousands of draws per hash call). The same seed and block hash always give the same
+# spins, races, shots, eggs and shuffles, so outcomes can be tied to and replayed from the
+# chain. reseed() chains a new block hash into the key.
+#
+# Draws are unbiased: a byte is used for ranges up to 256 and rejected when it falls in the
+# incomplete last cycle (e.g. 252..255 for 14 reel symbols). Bulk draws filter and reduce a
+# whole run of bytes in one bytes.translate() call.
+#
+# SYSTEM offers the same interface on top of `secrets`, for games that are not replayed.
+#
+# GameSeed gives a single-player GUI the same scheme the game server uses: the seed's hash is
+# recorded when the game starts and the seed when it quits, and at the start of each round the
+# stream is reseeded with the newest sealed block's hash; the round's record names that block,
+# so replay.py can re-make every draw.
+
+EXPANSION = 8192  # Bytes per hash expansion
+
+
+@lru_cache(maxsize=None)
+def byte_table(n):
+    # translate() table mapping a byte to byte % n, and the bytes to reject for range n
+    limit = 256 - 256 % n
+    return bytes(b % n for b in range(256)), bytes(range(limit, 256))
+
+
+def to_bytes(value):
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, int):
+        return value.to_bytes(32, "big")
+    return bytes(value)
+
+
+class HashRNG:
+    def __init__(self, seed, block_hash=b""):
+        # seed: per-session secret (bytes, str or int); block_hash: raw or hex hash it is tied to
+        self.key = hashlib.sha256(b"hash-rng" + to_bytes(seed) + to_bytes(block_hash)).digest()
+        self.counter = 0
+        self.buffer = b""
+        self.position = 0
+
+    def reseed(self, block_hash):
+        # Chain a new block hash into the key; draws from here on depend on it
+        self.key = hashlib.sha256(self.key + to_bytes(block_hash)).digest()
+        self.counter = 0
+        self.buffer = b""
+        self.position = 0
+
+    def expand(self):
+        self.buffer = hashlib.shake_256(self.key + self.counter.to_bytes(8, "big")).digest(EXPANSION)
+        self.position = 0
+        self.counter += 1
+
+    def read(self, count):
+        if self.position + count > len(self.buffer):
+            rest = self.buffer[self.position:]
+            self.expand()
+            return rest + self.read(count - len(rest))
+        data = self.buffer[self.position:self.position + count]
+        self.position += count
+        return data
+
+    def randbelow(self, n):
+        if n <= 0:
+            raise ValueError("n must be positive")
+        if n <= 256:
+            limit = 256 - 256 % n
+            while True:
+                if self.position >= len(self.buffer):
+                    self.expand()
+                b = self.buffer[self.position]
+                self.position += 1
+                if b < limit:
+                    return b % n
+        size = ((n - 1).bit_length() + 7) // 8
+        span = 256 ** size
+        limit = span - span % n
+        while True:
+            value = int.from_bytes(self.read(size), "big")
+            if value < limit:
+                return value % n
+
+    def indexes(self, n, k):
+        # k draws from range(n) in one go; bytes for n <= 256, a list otherwise
+        if n > 256:
+            return [self.randbelow(n) for _ in range(k)]
+        table, reject = byte_table(n)
+        out = b""
+        while len(out) < k:
+            if self.position >= len(self.buffer):
+                self.expand()
+            stop = min(self.position + k - len(out), len(self.buffer))
+            out += self.buffer[self.position:stop].translate(table, reject)
+            self.position = stop
+        return out
+
+    def choice(self, seq):
+        return seq[self.randbelow(len(seq))]
+
+    def choices(self, seq, k):
+        return [seq[i] for i in self.indexes(len(seq), k)]
+
+    def shuffle(self, x):
+        # Fisher-Yates, same as random.shuffle
+        for i in range(len(x) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            x[i], x[j] = x[j], x[i]
+
+
+class SystemRNG:
+    # The HashRNG interface on top of the OS generator (not reproducible)
+    randbelow = staticmethod(secrets.randbelow)
+    choice = staticmethod(secrets.choice)
+    shuffle = staticmethod(random.SystemRandom().shuffle)
+
+    def indexes(self, n, k):
+        return [secrets.randbelow(n) for _ in range(k)]
+
+    def choices(self, seq, k):
+        return [secrets.choice(seq) for _ in range(k)]
+
+
+SYSTEM = SystemRNG()
+
+
+def session_rng(blockchain):
+    # A fresh seed tied to the current chain tip; returns (seed, tip hash, rng) so the session
+    # can later reveal what its draws were derived from
+    seed = secrets.token_bytes(32)
+    tip = blockchain.get_last_block().raw_hash
+    return seed, tip, HashRNG(seed, tip)
+
+
+class GameSeed:
+    def __init__(self, blockchain, game):
+        # game: the name replay.py groups the game's records under (e.g. "Slot Machine")
+        self.game = game
+        self.seed, self.tip, self.rng = session_rng(blockchain)
+        self.sealed = None  # Newest block known to be on the chain
+        self.reseeded = 0  # Index of the block the stream was last reseeded with
+
+    def commitment(self):
+        # First record of the game
+        return {"Game": self.game, "Seed Hash": hashlib.sha256(self.seed).hexdigest(), "Chain Tip": self.tip.hex()}
+
+    def reveal(self):
+        # Last record of the game
+        return {"Game": self.game, "Reveal": self.seed.hex(), "Chain Tip": self.tip.hex()}
+
+    def on_sealed(self, block, position=0):
+        # BlockWorker callback, or called with the block a Mempool future resolved to
+        if self.sealed is None or block.index > self.sealed.index:
+            self.sealed = block
+
+    def begin_round(self):
+        # Call before a round's draws. Reseeds with the newest sealed block not used yet and
+        # returns the fields the round's first record must carry (empty if nothing changed).
+        block = self.sealed
+        if block is None or block.index <= self.reseeded:
+            return {}
+        self.rng.reseed(block.raw_hash)
+        self.reseeded = block.index
+        return {"Reseed Block": block.index, "Reseed Hash": block.hash}
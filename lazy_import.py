@@ -0,0 +1,24 @@
+import importlib
+
+# Deferred imports for heavy optional dependencies (tkinter, PIL, web3).
+# The game engines and Blockchain can then be imported headless, on servers or in test
+# workers, and the GUI / network modules are only loaded the first time they are used.
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
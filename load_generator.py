@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from game_server import HOST, PORT
+
+# Load generator for game_server.py: opens many concurrent sessions, plays each game's ops
+# as fast as the server answers and reports request throughput and latency percentiles.
+#   python load_generator.py --clients 2000 --requests 50
+# With --wait every request also waits until its records are sealed into a block, which
+# measures end-to-end confirmation latency instead.
+
+# Ops each simulated player cycles through
+PLAYS = {
+    "slot": ["spin"],
+    "blackjack": ["deal", "hit", "stand"],
+    "race": ["step"],
+    "roulette": ["fire"],
+    "egg": ["break"],
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def player(number, game, requests, wait, host, port, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def call(request):
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        return reply
+
+    try:
+        await call({"op": "start", "game": game, "player": f"player-{number}"})
+        ops = PLAYS[game]
+        for i in range(requests):
+            reply = await call({"op": ops[i % len(ops)], "wait": wait})
+            if not reply["ok"]:
+                errors.append(reply["error"])
+                # Game over or a hand that already ended: start a fresh session and carry on
+                await call({"op": "start", "game": game, "player": f"player-{number}"})
+        writer.write(b'{"op": "quit"}\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run(clients, requests, games, wait, host, port):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(player(n, random.choice(games), requests, wait, host, port, latencies, errors)
+                           for n in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{clients} clients x {requests} requests ({', '.join(games)}{', waiting for blocks' if wait else ''})")
+    print(f"  {len(latencies)} requests in {elapsed:.2f} s = {len(latencies) / elapsed:,.0f} req/s")
+    print(f"  latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    print(f"  {len(errors)} rejected requests (game over or hand already ended; session restarted)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive game_server.py with many concurrent players")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--games", default=",".join(PLAYS), help="comma-separated games to pick from")
+    parser.add_argument("--wait", action="store_true", help="wait for each request's records to be sealed")
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.requests, args.games.split(","), args.wait, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
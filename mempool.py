@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import metrics
+from merkle import batch_data, hash_event
+
+# Mempool: game events are submitted as pending records and a block producer thread seals
+# them into Merkle-batched blocks (see merkle.py) every `interval` seconds, or as soon as
+# `max_records` are waiting. submit() returns right away with a Future that resolves to
+# (block index, position in the block) once the record is sealed, so event throughput no
+# longer depends on how long a proof takes.
+#
+#   ordering="fifo"      records are sealed in submission order
+#   ordering="priority"  highest priority(record) first, FIFO among equals (payouts_first below)
+#
+# Records submitted with a key (e.g. a client request id) are deduplicated: submitting a key
+# that is pending or was recently sealed returns the same Future. dedup=True also keys records
+# without one by their hash; it is off by default because equal game events (two eggs of the
+# same type and tier) are distinct plays. Each submitter gets a token bucket of `rate` records per second with bursts
+# of up to `burst`; submit() / admit() raise RateLimitExceeded beyond that.
+
+count_event = metrics.counter("events").tick
+INTERVAL = 1.0
+MAX_RECORDS = 1000
+RECENT_HASHES = 100000  # Sealed record hashes remembered for deduplication
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def payouts_first(record):
+    # Priority function: winning records (positive "Amount") are sealed before the rest
+    amount = record.get("Amount", 0) if isinstance(record, dict) else 0
+    return 1 if isinstance(amount, (int, float)) and amount > 0 else 0
+
+
+class Mempool:
+    def __init__(self, blockchain, interval=INTERVAL, max_records=MAX_RECORDS, ordering="fifo", priority=None,
+                 rate=None, burst=None, dedup=False):
+        # priority: priority(record) -> number, used with ordering="priority" (default payouts_first)
+        # rate / burst: per-submitter limit in records per second (None = unlimited)
+        # dedup: also deduplicate records submitted without a key, by their hash
+        if ordering not in ("fifo", "priority"):
+            raise ValueError(f"unknown ordering {ordering!r}")
+        self.blockchain = blockchain
+        self.interval = interval
+        self.max_records = max_records
+        self.priority = (priority or payouts_first) if ordering == "priority" else None
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.dedup = dedup
+
+        self.pending = []  # heap of (-priority, sequence, record, record hash, future)
+        self.sequence = itertools.count()
+        self.futures = OrderedDict()  # record hash -> Future, pending and recently sealed
+        self.buckets = {}  # submitter -> [tokens, last refill time]
+        self.condition = threading.Condition()
+        self.closed = False
+        self.sealed_blocks = 0
+        self.sealed_records = 0
+
+        self.thread = threading.Thread(target=self.run, name="mempool", daemon=True)
+        self.thread.start()
+
+    def submit(self, record, submitter=None, key=None):
+        # submitter: rate-limited identity (None = not limited); key: deduplication key
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Mempool is closed")
+            record_hash = key if key is not None else (hash_event(record) if self.dedup else None)
+            if record_hash is not None and record_hash in self.futures:
+                return self.futures[record_hash]
+            if submitter is not None and self.rate is not None:
+                self.take_tokens(submitter, 1)
+
+            future = Future()
+            priority = self.priority(record) if self.priority is not None else 0
+            heapq.heappush(self.pending, (-priority, next(self.sequence), record, record_hash, future))
+            if record_hash is not None:
+                self.futures[record_hash] = future
+            if len(self.pending) >= self.max_records:
+                self.condition.notify()
+        if metrics.enabled:
+            count_event()
+        return future
+
+    def admit(self, submitter, count=1):
+        # Take `count` tokens from the submitter's bucket or raise RateLimitExceeded
+        if self.rate is None:
+            return
+        with self.condition:
+            self.take_tokens(submitter, count)
+
+    def take_tokens(self, submitter, count):
+        now = time.monotonic()
+        bucket = self.buckets.get(submitter)
+        if bucket is None:
+            bucket = self.buckets[submitter] = [self.burst, now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < count:
+            raise RateLimitExceeded(f"{submitter} is over {self.rate} records/s")
+        bucket[0] -= count
+
+    def run(self):
+        deadline = time.monotonic() + self.interval
+        while True:
+            with self.condition:
+                while not self.closed and len(self.pending) < self.max_records:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                batch = [heapq.heappop(self.pending) for _ in range(min(len(self.pending), self.max_records))]
+                done = self.closed and not self.pending
+            deadline = time.monotonic() + self.interval
+            self.seal(batch)
+            if done:
+                return
+
+    def seal(self, batch):
+        # Mine one block for the batch (outside the lock, so submit() never waits on it)
+        if not batch:
+            return
+        try:
+            data = batch_data([record for _, _, record, _, _ in batch])
+            last_proof = self.blockchain.get_last_block().proof
+            proof = self.blockchain.proof_of_work(last_proof)
+            self.blockchain.add_block(data, proof)
+            block_index = self.blockchain.get_last_block().index
+        except Exception as e:
+            for _, _, _, record_hash, future in batch:
+                self.forget(record_hash)
+                future.set_exception(e)
+            return
+
+        self.sealed_blocks += 1
+        self.sealed_records += len(batch)
+        for position, (_, _, _, _, future) in enumerate(batch):
+            future.set_result((block_index, position))
+        with self.condition:
+            while len(self.futures) > RECENT_HASHES + len(self.pending):
+                self.futures.popitem(last=False)
+
+    def forget(self, record_hash):
+        if record_hash is not None:
+            with self.condition:
+                self.futures.pop(record_hash, None)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def close(self):
+        # Seal everything still pending, then stop the producer
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
@@ -0,0 +1,70 @@
+import hashlib
+
+import codec
+
+# Merkle trees over game events (hashed in their canonical encoding, see codec.py) so one mined block can carry a whole batch.
+# Leaves and inner nodes are hashed with different prefixes; an odd node at the end
+# of a level is promoted to the next level unchanged. (Pairing it with itself would give
+# [a, b, c] and [a, b, c, c] the same root, so a duplicated event would verify.)
+
+
+def hash_event(event):
+    return hashlib.sha256(b"\x00" + codec.encode(event)).digest()
+
+
+def hash_pair(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaves):
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(events):
+    if not events:
+        return hashlib.sha256(b"").hexdigest()
+    return build_levels([hash_event(e) for e in events])[-1][0].hex()
+
+
+def merkle_proof(events, position):
+    # Sibling hashes from the leaf up to the root; the position gives the left/right order.
+    # None marks a level where the node has no sibling and is promoted as is.
+    if not 0 <= position < len(events):
+        raise IndexError(f"position {position} is outside a batch of {len(events)} events")
+    proof = []
+    index = position
+    for level in build_levels([hash_event(e) for e in events])[:-1]:
+        sibling = index ^ 1
+        proof.append(level[sibling].hex() if sibling < len(level) else None)
+        index //= 2
+    return proof
+
+
+def verify_event(event, position, proof, root):
+    node = hash_event(event)
+    index = position
+    for sibling in proof:
+        if sibling is None:
+            index //= 2
+            continue
+        sibling = bytes.fromhex(sibling)
+        node = hash_pair(node, sibling) if index % 2 == 0 else hash_pair(sibling, node)
+        index //= 2
+    return node.hex() == root
+
+
+def batch_data(events):
+    # Block data for a sealed batch
+    return {"Merkle Root": merkle_root(events), "Events": events}
+
+
+def event_proof(block, position):
+    # Inclusion proof for the event at `position` of a batched block
+    return merkle_proof(block.data["Events"], position)
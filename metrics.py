@@ -0,0 +1,239 @@
+import atexit
+import itertools
+import os
+import threading
+import time
+
+# Hot-path instrumentation: per-stage latency histograms (p50 / p99 / max) and counters,
+# exported as Prometheus text on a local port or dumped to a file.
+#
+# Call sites check the module flag before reading the clock, so disabled instrumentation
+# costs one global lookup and a branch:
+#
+#     timing = metrics.enabled
+#     if timing:
+#         start = time.perf_counter_ns()
+#     ...
+#     if timing:
+#         metrics.observe("mining", start)
+#
+# Enable with metrics.enable() or the environment:
+#   GAME_METRICS=1              collect
+#   GAME_METRICS_PORT=9100      collect and serve http://127.0.0.1:9100/metrics
+#   GAME_METRICS_FILE=out.prom  collect and write the text there at exit
+#
+# Stages that take well under a microsecond (block hashing) are sampled, so that timing them
+# does not cost more than the work being timed; their histograms hold every SAMPLE_EVERY-th block.
+# The per-event hot path (counting by one) runs in C through itertools, without a Python-level
+# call or a lock, so enabled metrics stay under 1% of a cached-proof event.
+
+PREFIX = "game"
+SAMPLE_EVERY = 256  # Sub-microsecond stages (hashing) time one block in this many
+SUB_BUCKETS = 4  # Histogram buckets per power of two (about 19% wide)
+MAX_BUCKET = 64 * SUB_BUCKETS
+
+enabled = False
+histograms = {}
+counters = {}
+lock = threading.Lock()
+
+
+class Histogram:
+    # Log-bucketed latency histogram in nanoseconds; quantiles are accurate to a bucket width
+    def __init__(self, stage):
+        self.stage = stage
+        self.buckets = [0] * MAX_BUCKET
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def observe(self, ns):
+        if ns <= 0:
+            ns = 1
+        exponent = ns.bit_length() - 1
+        if exponent >= 2:
+            bucket = exponent * SUB_BUCKETS + ((ns >> (exponent - 2)) & (SUB_BUCKETS - 1))
+        else:
+            bucket = exponent * SUB_BUCKETS
+        with self.lock:
+            self.buckets[bucket] += 1
+            self.count += 1
+            self.total += ns
+            if ns > self.max:
+                self.max = ns
+
+    @staticmethod
+    def upper_bound(bucket):
+        # Largest nanosecond value that falls into the bucket
+        exponent, sub = divmod(bucket, SUB_BUCKETS)
+        if exponent < 2:
+            return 2 ** (exponent + 1) - 1
+        return (2 ** exponent) + ((sub + 1) << (exponent - 2)) - 1
+
+    def quantile(self, fraction):
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(self.upper_bound(bucket), self.max)
+        return self.max
+
+
+class Counter:
+    # Increments of one go through tick(), itertools.count's __next__, which is atomic under the
+    # GIL; other amounts take the lock. tick stays valid across zero(), so call sites can bind it.
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.ones = itertools.count()
+        self.tick = self.ones.__next__
+        self.extra = 0
+        self.base = 0
+        self.reads = 0  # Numbers read() took from self.ones itself
+
+    def zero(self):
+        with self.lock:
+            self.base += self.read()
+
+    def add(self, amount=1):
+        if amount == 1:
+            self.tick()
+            return
+        with self.lock:
+            self.extra += amount
+
+    def read(self):
+        # itertools.count has no accessor, so take its next number and count that read too
+        ones = next(self.ones) - self.reads
+        self.reads += 1
+        return ones + self.extra - self.base
+
+    @property
+    def value(self):
+        with self.lock:
+            return self.read()
+
+
+def histogram(stage):
+    found = histograms.get(stage)
+    if found is None:
+        with lock:
+            found = histograms.setdefault(stage, Histogram(stage))
+    return found
+
+
+def counter(name):
+    found = counters.get(name)
+    if found is None:
+        with lock:
+            found = counters.setdefault(name, Counter(name))
+    return found
+
+
+def observe(stage, start_ns):
+    # Record the time since start_ns (from time.perf_counter_ns()) for a stage
+    histogram(stage).observe(time.perf_counter_ns() - start_ns)
+
+
+def count(name, amount=1):
+    (counters.get(name) or counter(name)).add(amount)
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    # Counters are zeroed in place, so modules can hold on to the ones they increment
+    with lock:
+        histograms.clear()
+        for found in counters.values():
+            found.zero()
+
+
+def prometheus_text():
+    lines = []
+    for name, found in sorted(counters.items()):
+        metric = f"{PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {found.value}")
+
+    metric = f"{PREFIX}_stage_latency_seconds"
+    if histograms:
+        lines.append(f"# HELP {metric} Time spent per stage")
+        lines.append(f"# TYPE {metric} histogram")
+    for stage, found in sorted(histograms.items()):
+        cumulative = 0
+        for bucket, bucket_count in enumerate(found.buckets):
+            if bucket_count:
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{(found.upper_bound(bucket) + 1) / 1e9:.9g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {found.count}')
+        lines.append(f'{metric}_sum{{stage="{stage}"}} {found.total / 1e9:.9g}')
+        lines.append(f'{metric}_count{{stage="{stage}"}} {found.count}')
+
+    quantiles = f"{PREFIX}_stage_latency_quantile_seconds"
+    if histograms:
+        lines.append(f"# TYPE {quantiles} gauge")
+    for stage, found in sorted(histograms.items()):
+        for label, fraction in (("0.5", 0.5), ("0.99", 0.99), ("1", 1.0)):
+            value = found.max if fraction == 1.0 else found.quantile(fraction)
+            lines.append(f'{quantiles}{{stage="{stage}",quantile="{label}"}} {value / 1e9:.9g}')
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    # Human-readable p50 / p99 / max per stage, for the console
+    rows = []
+    for stage, found in sorted(histograms.items()):
+        rows.append(f"{stage:>12}: n={found.count} p50={found.quantile(0.5) / 1e6:.3f} ms "
+                    f"p99={found.quantile(0.99) / 1e6:.3f} ms max={found.max / 1e6:.3f} ms")
+    for name, found in sorted(counters.items()):
+        rows.append(f"{name:>12}: {found.value}")
+    return "\n".join(rows)
+
+
+def dump(path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def serve(port, host="127.0.0.1"):
+    # Serve /metrics on a daemon thread; returns the HTTP server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+if os.environ.get("GAME_METRICS") or os.environ.get("GAME_METRICS_PORT") or os.environ.get("GAME_METRICS_FILE"):
+    enable()
+    if os.environ.get("GAME_METRICS_PORT"):
+        serve(int(os.environ["GAME_METRICS_PORT"]))
+    if os.environ.get("GAME_METRICS_FILE"):
+        atexit.register(dump, os.environ["GAME_METRICS_FILE"])
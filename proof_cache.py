@@ -0,0 +1,107 @@
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+from blockchain import Blockchain, valid_proof
+
+# Cache of last_proof -> proof pairs.
+# proof_of_work only depends on the previous proof and every session starts from the
+# genesis proof (100), so every game mines the same sequence of proofs. The pairs are kept
+# in an append-only file of fixed 16-byte records shared by all sessions and games.
+
+RECORD = struct.Struct("<QQ")  # last_proof, proof
+MAX_VALUE = 2 ** 64 - 1
+
+
+class ProofCache:
+    def __init__(self, path="proof_cache.bin", max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # least recently used first
+        self.records_on_disk = 0
+        self.file = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % RECORD.size  # ignore a torn record at the end
+        for last_proof, proof in RECORD.iter_unpack(data[:usable]):
+            self.entries[last_proof] = proof
+            self.entries.move_to_end(last_proof)
+        self.records_on_disk = usable // RECORD.size
+        self.evict()
+
+    def get(self, last_proof):
+        proof = self.entries.get(last_proof)
+        if proof is None:
+            return None
+
+        # Never trust the file blindly
+        if not valid_proof(last_proof, proof):
+            del self.entries[last_proof]
+            return None
+        self.entries.move_to_end(last_proof)
+        return proof
+
+    def put(self, last_proof, proof):
+        if last_proof > MAX_VALUE or proof > MAX_VALUE or self.entries.get(last_proof) == proof:
+            return
+        self.entries[last_proof] = proof
+        self.entries.move_to_end(last_proof)
+
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        self.file.write(RECORD.pack(last_proof, proof))
+        self.file.flush()
+        self.records_on_disk += 1
+
+        self.evict()
+        # Rewrite the file once it holds too many stale or evicted records
+        if self.records_on_disk > 2 * self.max_entries:
+            self.compact()
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def compact(self):
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for last_proof, proof in self.entries.items():
+                f.write(RECORD.pack(last_proof, proof))
+        os.replace(tmp_path, self.path)
+        self.records_on_disk = len(self.entries)
+
+    def prefill(self, count, start_proof=100):
+        # Mine `count` proofs ahead of time following the chain from start_proof
+        blockchain = Blockchain()
+        last_proof = start_proof
+        for _ in range(count):
+            proof = self.get(last_proof)
+            if proof is None:
+                proof = blockchain.proof_of_work(last_proof)
+                self.put(last_proof, proof)
+            last_proof = proof
+        blockchain.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+if __name__ == "__main__":
+    # Pre-fill the shared cache: python proof_cache.py [count]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cache = ProofCache()
+    cache.prefill(count)
+    cache.close()
+    print(f"{len(cache)} proofs cached in {cache.path}")
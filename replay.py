@@ -0,0 +1,419 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import codec
+from blockchain import Blockchain, pack_blocks, unpack_blocks
+from chain_index import game_of
+from chain_store import ChainStore
+from hash_rng import HashRNG
+from Slot import SlotMachine
+from blackjack import BlackjackGame
+from Racing_blockchain import HorseRace
+from Russian_Roulette import RussianRoulette
+from egg import EggGame
+
+# Session replay: reads a recorded chain, groups its records into sessions and re-runs them
+# through the headless engines, checking every recorded outcome, amount, balance, position,
+# hand and life count against what the engines compute now. No GUI and no mining, so it is
+# a fast audit and a regression check for payout logic such as SlotMachine.evaluate_spin.
+#
+# Sessions from game_server.py are keyed by their Session id and replayed in Event order.
+# When a session's seed was revealed (its "Reveal" record), the seed is checked against the
+# session id (a prefix of its commitment) and the draws themselves are re-made with the same
+# HashRNG and compared too. Records from the single-player GUIs form one session per game;
+# a GUI records its seed's hash first and the seed when it quits (hash_rng.GameSeed), and
+# reseeds on sealed blocks, which the round's record names ("Reseed Block", "Reseed Hash").
+# Those hashes are checked against the chain itself, so outcomes cannot have been picked
+# before the block they depend on was sealed.
+#
+# Throughput is bound by decoding the chain (codec.decode, about 130k events/s on one core),
+# not by the checks, which run at over a million events/s on decoded records, re-drawn seeded
+# spins included. replay_chain(workers=N) therefore gives each process its own range of blocks
+# (byte range for a JSONL export) to read and decode; the main process only unpickles the
+# records (about 0.3 us per event), groups them into sessions and checks them, so one chain
+# approaches a million events/s given the cores. replay_archives() decodes and checks one
+# archive per process, so it scales with cores.
+#
+#   python replay.py slot_blockchain.jsonl server_chain/ --workers 8
+
+SLOT_BALANCE = 100
+LIVES = 1
+EGG_ANIMALS = set(EggGame.ANIMALS)
+
+
+@lru_cache(maxsize=None)
+def engine_chain():
+    # Engines that own a chain get this one; replay never mines or appends to it
+    return Blockchain()
+
+
+def load_records(source, hashes=None, first=0, stop=None):
+    # Yields (block index, position, record) from a chain, a ChainStore directory, a JSONL export
+    # or pack_blocks bytes. hashes: optional dict that is filled with block index -> hash (hex).
+    # first/stop limit it to blocks first..stop-1, or for a JSONL export to the lines that
+    # start in that byte range; pack_blocks bytes are read whole.
+    if isinstance(source, str) and os.path.isdir(source):
+        store = ChainStore(source, read_only=True)
+        try:
+            yield from load_records(store, hashes, first, stop)
+        finally:
+            store.close()
+        return
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if first:
+                f.seek(first - 1)
+                f.readline()  # The line that starts before first belongs to the previous range
+            position = f.tell()
+            for line in f:
+                if stop is not None and position >= stop:
+                    break
+                position += len(line)
+                block = json.loads(line)
+                if hashes is not None:
+                    hashes[block["index"]] = block["hash"]
+                yield from block_records(block["index"], block["data"])
+        return
+    if isinstance(source, bytes):
+        blocks = unpack_blocks(source)
+    else:
+        stop = len(source) if stop is None else stop
+        blocks = (source[i] for i in range(max(first, getattr(source, "first_index", 0)), stop))
+    for block in blocks:
+        if hashes is not None:
+            hashes[block.index] = block.hash
+        yield from block_records(block.index, codec.decode(block.payload))
+
+
+def decode_range(source, first, stop):
+    # One worker's share of a chain: its records and block hashes, decoded in the worker
+    hashes = {}
+    return list(load_records(source, hashes, first, stop)), hashes
+
+
+def split_chain(source, workers):
+    # (source, first, stop) for each worker: block ranges of a store or an in-memory chain (sent
+    # as pack_blocks bytes), byte ranges of a JSONL export
+    if isinstance(source, str) and os.path.isdir(source):
+        store = ChainStore(source, read_only=True)
+        first, stop = 0, len(store)
+        store.close()
+    elif isinstance(source, str):
+        first, stop = 0, os.path.getsize(source)
+    else:
+        first, stop = getattr(source, "first_index", 0), len(source)
+    bounds = [first + (stop - first) * i // workers for i in range(workers + 1)]
+    for first, stop in zip(bounds, bounds[1:]):
+        if isinstance(source, str):
+            yield source, first, stop
+        else:
+            yield pack_blocks(source[i] for i in range(first, stop)), first, stop
+
+
+def block_records(index, data):
+    if isinstance(data, dict) and "Merkle Root" in data:
+        for position, record in enumerate(data["Events"]):
+            yield index, position, record
+    elif index > 0:
+        yield index, 0, data
+
+
+def session_key(record):
+    if "Session" in record:
+        return record.get("Game"), record["Session"]
+    if "Transaction Hash" in record or "Animal" in record:
+        return "Ethereum", None  # Ganache / web3 games: payouts live on the Ethereum side
+    return game_of(record), None
+
+
+def group_sessions(records):
+    sessions = {}
+    for index, position, record in records:
+        if isinstance(record, dict):
+            sessions.setdefault(session_key(record), []).append((index, position, record))
+    for key, events in sessions.items():
+        if key[1] is not None:
+            events.sort(key=lambda event: event[2]["Event"])  # Priority mempools may seal out of order
+    return sessions
+
+
+def session_rng(events):
+    # The HashRNG the session drew from, when its seed has been revealed
+    for _, _, record in events:
+        if "Reveal" in record:
+            return HashRNG(bytes.fromhex(record["Reveal"]), bytes.fromhex(record["Chain Tip"]))
+    return None
+
+
+def reseed(rng, record):
+    # Rounds that start on a newly sealed block name it; the GUI reseeded before drawing
+    if rng is not None and "Reseed Hash" in record:
+        rng.reseed(bytes.fromhex(record["Reseed Hash"]))
+
+
+class Check:
+    def __init__(self):
+        self.events = 0
+        self.mismatches = []  # (block index, position, field, expected, recorded)
+
+    def compare(self, event, field, expected, recorded):
+        if expected != recorded:
+            self.mismatches.append((event[0], event[1], field, expected, recorded))
+
+
+def slot_draws(engine, rng, events):
+    # The spins the session drew, in order. Single spins between two reseeds are re-drawn in one
+    # bulk call, which gives the same spins (see test_hash_rng.py) far faster.
+    drawn = []
+    singles = 0
+    covered = 0  # Events still covered by the last autoplay run
+    for event in events:
+        record = event[2]
+        if "Reseed Hash" in record or "Autoplay" in record:
+            drawn += engine.spins(singles)
+            singles = 0
+            reseed(rng, record)
+        if "Autoplay" in record:
+            # The run drew all its spins at once, including those after it stopped
+            count, played = record["Autoplay"]
+            drawn += engine.spins(count)[:played]
+            covered = played
+        if covered:
+            covered -= 1
+        else:
+            singles += 1
+    return drawn + engine.spins(singles)
+
+
+def replay_slot(events, rng, check):
+    engine = SlotMachine(rng) if rng is not None else SlotMachine()
+    balance = SLOT_BALANCE
+    drawn = slot_draws(engine, rng, events) if rng is not None else None
+    for i, event in enumerate(events):
+        record = event[2]
+        spin = record["Spin Result"]
+        if drawn is not None:
+            check.compare(event, "Spin Result", drawn[i], spin)
+        outcome, amount = engine.evaluate_spin(spin)  # A payout-table lookup
+        balance += amount
+        check.compare(event, "Outcome", outcome, record["Outcome"])
+        check.compare(event, "Amount", amount, record["Amount"])
+        check.compare(event, "Balance After Spin", balance, record["Balance After Spin"])
+        check.events += 1
+
+
+def replay_race(events, rng, check):
+    engine = HorseRace(rng) if rng is not None else None
+    positions = [0, 0, 0]
+    for event in events:
+        record = event[2]
+        spin = record["Spin Result"]
+        reseed(rng, record)
+        if engine is not None:
+            check.compare(event, "Spin Result", engine.spin(), spin)
+        positions = [position + step for position, step in zip(positions, spin)]
+        check.compare(event, "Player Positions", positions, record["Player Positions"])
+        check.events += 1
+
+
+def replay_roulette(events, rng, check):
+    engine = RussianRoulette(rng) if rng is not None else None
+    lives = {}
+    for event in events:
+        record = event[2]
+        shooter = record.get("Shooter", record.get("Player"))
+        gun = record["Bullet Location"]
+        reseed(rng, record)
+        if engine is not None:
+            chambers = engine.gun1_chambers if record["Gun"] == 1 else engine.gun2_chambers
+            check.compare(event, "Bullet Location", chambers, gun)
+            check.compare(event, "Chamber Fired", engine.pull_trigger(chambers)[0], record["Chamber Fired"])
+        outcome = "Lost" if gun[record["Chamber Fired"]] == 1 else "Survived"
+        check.compare(event, "Outcome", outcome, record["Outcome"])
+        before = lives.get(shooter, LIVES)
+        check.compare(event, "Lives Before Spin", before, record["Lives Before Spin"])
+        lives[shooter] = before - 1 if outcome == "Lost" else before
+        if outcome == "Lost":
+            check.compare(event, "Lives After Spin", lives[shooter], record.get("Lives After Spin"))
+        check.events += 1
+
+
+def replay_blackjack(events, rng, check):
+    # Hands are re-scored, and the dealer must have drawn exactly until 17 unless the player bust.
+    # The GUI numbers its deals and records abandoned ones, so with a revealed seed its shuffles
+    # are re-drawn too; server deals that never finished leave no record, so theirs are not.
+    engine = BlackjackGame(blockchain=engine_chain())
+    dealer = BlackjackGame(blockchain=engine_chain(), rng=rng) if rng is not None else None
+    deals = 0
+    for event in events:
+        record = event[2]
+        if dealer is not None and record.get("Deal"):
+            reseed(rng, record)
+            deals += 1
+            check.compare(event, "Deal", deals, record["Deal"])
+            dealt = deal_hands(dealer, len(record["Player Hand"]), len(record["Dealer Hand"]))
+            check.compare(event, "Player Hand", dealt[0], record["Player Hand"])
+            check.compare(event, "Dealer Hand", dealt[1], record["Dealer Hand"])
+        if record["Result"] == "Abandoned":
+            check.events += 1
+            continue
+        engine.player_hand = record["Player Hand"]
+        engine.dealer_hand = record["Dealer Hand"]
+        result = engine.check_winner()[0]
+        check.compare(event, "Result", result, record["Result"])
+        if result != "Player Busts":
+            dealer_total = engine.calculate_hand_value(engine.dealer_hand)
+            before_last = engine.calculate_hand_value(engine.dealer_hand[:-1])
+            stood_right = dealer_total >= 17 and (len(engine.dealer_hand) == 2 or before_last < 17)
+            check.compare(event, "Dealer Hand", True, stood_right)
+        check.events += 1
+
+
+def deal_hands(engine, player_cards, dealer_cards):
+    # The hands a fresh deal gives when the player takes player_cards and the dealer dealer_cards
+    engine.new_game()
+    player_hand = engine.player_hand + [engine.deck.pop() for _ in range(player_cards - 2)]
+    dealer_hand = engine.dealer_hand + [engine.deck.pop() for _ in range(dealer_cards - 2)]
+    return player_hand, dealer_hand
+
+
+def replay_egg(events, rng, check):
+    drawn = []
+    engine = EggGame(blockchain=engine_chain(), submit=drawn.append, rng=rng) if rng is not None else None
+    for event in events:
+        record = event[2]
+        reseed(rng, record)
+        if engine is not None:
+            engine.break_egg()
+            check.compare(event, "Animal", drawn.pop(), {"type": record["type"], "tier": record["tier"]})
+        else:
+            check.compare(event, "type", True, record["type"] in EGG_ANIMALS)
+            check.compare(event, "tier", True, 0 <= record["tier"] <= 9)
+        check.events += 1
+
+
+REPLAYERS = {
+    "Slot Machine": replay_slot,
+    "Horse Race": replay_race,
+    "Russian Roulette": replay_roulette,
+    "Blackjack": replay_blackjack,
+    "Egg": replay_egg,
+}
+
+
+def check_commitment(key, events, check):
+    # Server session ids are a prefix of sha256(seed); older chains numbered sessions instead.
+    # GUI sessions record the full commitment ("Seed Hash") as their first record.
+    seed_hashes = [event for event in events if "Seed Hash" in event[2]]
+    for event in events:
+        record = event[2]
+        if "Reveal" not in record:
+            continue
+        commitment = hashlib.sha256(bytes.fromhex(record["Reveal"])).hexdigest()
+        if isinstance(key[1], str):
+            check.compare(event, "Session", commitment[:len(key[1])], key[1])
+        for committed in seed_hashes:
+            check.compare(committed, "Seed Hash", commitment, committed[2]["Seed Hash"])
+            check.compare(committed, "Chain Tip", record["Chain Tip"], committed[2]["Chain Tip"])
+
+
+def check_reseeds(sessions, hashes):
+    # Every "Reseed Hash" must be the hash of the named block, sealed before the record's block
+    check = Check()
+    for events in sessions.values():
+        for event in events:
+            record = event[2]
+            if "Reseed Hash" in record:
+                block = record["Reseed Block"]
+                check.compare(event, "Reseed Hash", hashes.get(block), record["Reseed Hash"])
+                check.compare(event, "Reseed Block", True, block < event[0])
+    return None, 0, check.mismatches
+
+
+def replay_session(key, events):
+    # Returns (game, events checked, mismatches); unknown games are skipped
+    check = Check()
+    replayer = REPLAYERS.get(key[0])
+    if replayer is not None:
+        check_commitment(key, events, check)
+        rng = session_rng(events)
+        replayer([event for event in events if "Reveal" not in event[2] and "Seed Hash" not in event[2]], rng, check)
+    return key[0], check.events, check.mismatches
+
+
+def replay_sessions(items):
+    return [replay_session(key, events) for key, events in items]
+
+
+def replay_source(source):
+    # Replay every session in one chain (one task when replaying archives in parallel)
+    hashes = {}
+    sessions = group_sessions(load_records(source, hashes))
+    return replay_sessions(sessions.items()) + [check_reseeds(sessions, hashes)]
+
+
+def summarize(results, elapsed):
+    report = {"sessions": 0, "events": 0, "skipped": 0, "mismatches": [], "seconds": elapsed}
+    for game, events, mismatches in results:
+        if game is None:
+            report["mismatches"].extend(mismatches)  # Checks of the chain as a whole
+        elif game in REPLAYERS:
+            report["sessions"] += 1
+            report["events"] += events
+            report["mismatches"].extend(mismatches)
+        else:
+            report["skipped"] += 1
+    report["events_per_second"] = report["events"] / elapsed if elapsed else 0.0
+    return report
+
+
+def replay_chain(source, workers=1):
+    # Replay one chain; with workers > 1 each process decodes its own range of the chain
+    start = time.perf_counter()
+    hashes = {}
+    if workers == 1:
+        records = load_records(source, hashes)
+    else:
+        records = []
+        with ProcessPoolExecutor(workers) as pool:
+            for part, part_hashes in pool.map(decode_range, *zip(*split_chain(source, workers))):
+                records += part  # Ranges come back in chain order
+                hashes.update(part_hashes)
+    sessions = group_sessions(records)
+    results = replay_sessions(sessions.items()) + [check_reseeds(sessions, hashes)]
+    return summarize(results, time.perf_counter() - start)
+
+
+def replay_archives(sources, workers=None):
+    # Replay many archived chains (ChainStore directories or JSONL exports) in parallel
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        results = [result for chain in pool.map(replay_source, sources) for result in chain]
+    return summarize(results, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions and check them against the engines")
+    parser.add_argument("sources", nargs="+", help="ChainStore directories or JSONL exports")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if len(args.sources) == 1:
+        report = replay_chain(args.sources[0], args.workers)
+    else:
+        report = replay_archives(args.sources, args.workers)
+    print(f"{report['events']} events in {report['sessions']} sessions replayed in {report['seconds']:.2f} s "
+          f"({report['events_per_second']:,.0f} events/s), {report['skipped']} sessions skipped")
+    for index, position, field, expected, recorded in report["mismatches"][:20]:
+        print(f"  block {index} #{position}: {field} recorded {recorded!r}, engine gives {expected!r}")
+    if report["mismatches"]:
+        raise SystemExit(f"{len(report['mismatches'])} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import itertools
+import time
+
+from lazy_import import lazy_import
+import Slot
+import Slot_Ganache
+
+# numpy is only needed for Monte Carlo and ruin curves; the exact tables work without it
+np = lazy_import("numpy")
+
+# Payout analysis for the slot machines: exact return-to-player and hit-frequency tables by
+# enumerating all 14^3 reel outcomes, plus NumPy-vectorized Monte Carlo (10^8 spins in
+# seconds) and bankroll-ruin curves, so a payout change in evaluate_spin can be judged
+# before it ships.
+#
+#   python slot_analysis.py                       both machines, exact tables only
+#   python slot_analysis.py --spins 100000000     plus Monte Carlo and ruin curves
+#
+# Amounts are what evaluate_spin returns (net units per spin). The stake a spin risks is
+# taken as the loss amount (5 units), so RTP = (stake + expected amount) / stake.
+
+MACHINES = {
+    "slot": Slot.SlotMachine,  # Triple 7s pay 500, pairs on reels 1-2 or 2-3
+    "ganache": Slot_Ganache.SlotMachine,  # Triple 7s pay 1000, and reels 1-3 also pay as a pair
+}
+BET = 5
+START_BALANCE = 100  # Both GUIs start the player on 100 units
+CHUNK = 10 ** 7  # Spins per Monte Carlo batch
+
+
+def symbol_probabilities(reels, weights=None):
+    if weights is None:
+        return [1 / len(reels)] * len(reels)
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def payout_table(machine):
+    # Amount for every (reel 1, reel 2, reel 3) symbol index, flattened as a*196 + b*14 + c
+    reels = machine.reels
+    return [machine.evaluate_spin([reels[a], reels[b], reels[c]])[1]
+            for a, b, c in itertools.product(range(len(reels)), repeat=3)]
+
+
+def exact_stats(machine, weights=None, bet=BET):
+    # Enumerate every outcome: probability of each (outcome, amount), expected amount,
+    # variance and RTP
+    reels = machine.reels
+    probabilities = symbol_probabilities(reels, weights)
+    hits = {}
+    mean = 0.0
+    square = 0.0
+    for a, b, c in itertools.product(range(len(reels)), repeat=3):
+        probability = probabilities[a] * probabilities[b] * probabilities[c]
+        outcome, amount = machine.evaluate_spin([reels[a], reels[b], reels[c]])
+        key = (outcome, amount)
+        combinations, total = hits.get(key, (0, 0.0))
+        hits[key] = (combinations + 1, total + probability)
+        mean += probability * amount
+        square += probability * amount * amount
+    variance = square - mean * mean
+    return {
+        "hits": dict(sorted(hits.items(), key=lambda item: -item[0][1])),
+        "hit_frequency": sum(probability for (outcome, _), (_, probability) in hits.items() if outcome == "Win"),
+        "mean": mean,
+        "variance": variance,
+        "std": variance ** 0.5,
+        "rtp": (bet + mean) / bet,
+    }
+
+
+def encoded_table(machine):
+    return np.array(payout_table(machine), dtype=np.int64)
+
+
+def draw_indexes(generator, count, reels, weights=None):
+    # Flat payout-table indexes for `count` spins of integer-encoded symbols
+    if weights is None:
+        symbols = generator.integers(0, reels, size=(count, 3), dtype=np.int16)
+    else:
+        symbols = generator.choice(reels, size=(count, 3), p=symbol_probabilities(range(reels), weights)).astype(np.int16)
+    return symbols[:, 0] * reels * reels + symbols[:, 1] * reels + symbols[:, 2]
+
+
+def monte_carlo(machine, spins, weights=None, seed=None, bet=BET, chunk=CHUNK):
+    # Vectorized simulation in chunks; returns the same statistics as exact_stats (no hit table)
+    generator = np.random.default_rng(seed)
+    table = encoded_table(machine)
+    reels = len(machine.reels)
+    total = 0
+    square = 0
+    wins = 0
+    done = 0
+    while done < spins:
+        count = min(chunk, spins - done)
+        amounts = table[draw_indexes(generator, count, reels, weights)]
+        total += int(amounts.sum())
+        square += int((amounts * amounts).sum())
+        wins += int((amounts > 0).sum())
+        done += count
+    mean = total / spins
+    variance = square / spins - mean * mean
+    return {"spins": spins, "hit_frequency": wins / spins, "mean": mean, "variance": variance,
+            "std": variance ** 0.5, "rtp": (bet + mean) / bet}
+
+
+def ruin_curve(machine, players=10000, spins=1000, start_balance=START_BALANCE, weights=None, seed=None):
+    # Fraction of players whose balance has hit zero by each spin (index t = after t + 1 spins),
+    # playing until ruin the way the GUIs do
+    generator = np.random.default_rng(seed)
+    table = encoded_table(machine).astype(np.int32)
+    reels = len(machine.reels)
+    amounts = table[draw_indexes(generator, players * spins, reels, weights)].reshape(players, spins)
+    balances = start_balance + np.cumsum(amounts, axis=1, dtype=np.int32)
+    ruined = np.minimum.accumulate(balances, axis=1) <= 0
+    return ruined.mean(axis=0)
+
+
+def print_exact(name, stats):
+    print(f"{name}: RTP {stats['rtp']:.4%}, hit frequency {stats['hit_frequency']:.4%}, "
+          f"mean {stats['mean']:+.4f}, std {stats['std']:.3f} units per spin")
+    for (outcome, amount), (combinations, probability) in stats["hits"].items():
+        print(f"  {outcome:5} {amount:+6}: {combinations:5} outcomes, p = {probability:.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact and Monte Carlo payout analysis for the slot machines")
+    parser.add_argument("--machine", choices=sorted(MACHINES), action="append", help="default: all")
+    parser.add_argument("--spins", type=float, default=0, help="Monte Carlo spins (needs numpy)")
+    parser.add_argument("--players", type=int, default=10000, help="players for the ruin curve")
+    parser.add_argument("--horizon", type=int, default=1000, help="spins per player for the ruin curve")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    for name in args.machine or MACHINES:
+        machine = MACHINES[name]()
+        print_exact(name, exact_stats(machine))
+        if not args.spins:
+            continue
+        start = time.perf_counter()
+        stats = monte_carlo(machine, int(args.spins), seed=args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"  Monte Carlo, {stats['spins']:,} spins in {elapsed:.1f} s: RTP {stats['rtp']:.4%}, "
+              f"hit frequency {stats['hit_frequency']:.4%}, std {stats['std']:.3f}")
+        curve = ruin_curve(machine, args.players, args.horizon, seed=args.seed)
+        checkpoints = [t for t in (10, 20, 50, 100, 200, 500, 1000, 2000, 5000) if t <= args.horizon]
+        print("  ruin by spin: " + ", ".join(f"{t}: {curve[t - 1]:.1%}" for t in checkpoints))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import threading
+
+from block_worker import BlockWorker
+from blockchain import Blockchain
+
+DIFFICULTY = 4
+
+
+def test_records_are_mined_in_submission_order_with_callbacks():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    worker = BlockWorker(blockchain)
+    sealed = []
+    indexes = [worker.submit({"Event": i}, callback=lambda block, position: sealed.append((block.index, position)))
+               for i in range(5)]
+    worker.flush()  # Runs the callbacks when there is no Tk root
+    assert indexes == [1, 2, 3, 4, 5]
+    assert [block.data for block in blockchain.chain[1:]] == [{"Event": i} for i in range(5)]
+    assert sealed == [(i, 0) for i in indexes]
+    worker.close()
+
+
+def test_batches_seal_on_size_timeout_and_flush():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    worker = BlockWorker(blockchain, batch_size=3, batch_timeout=0.5)
+    sealed = []
+    for i in range(7):
+        worker.submit({"Event": i}, callback=lambda block, position: sealed.append((block.index, position)))
+    worker.flush()
+    events = [[event["Event"] for event in block.data["Events"]] for block in blockchain.chain[1:]]
+    assert events[:2] == [[0, 1, 2], [3, 4, 5]]
+    assert events[2] == [6]  # Sealed by batch_timeout or by flush(), whichever came first
+    assert sealed == [(1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2), (3, 0)]
+    worker.close()
+
+
+def test_failed_batch_is_reported_and_the_worker_keeps_running():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    failures = []
+    worker = BlockWorker(blockchain, on_error=lambda error, records: failures.append(records))
+    worker.submit({"Event": 0})
+    worker.submit({"Event": object()})  # The codec cannot encode it
+    worker.submit({"Event": 2})
+
+    # close() flushes; it used to wait forever once a batch had killed the worker thread
+    closer = threading.Thread(target=worker.close, daemon=True)
+    closer.start()
+    closer.join(timeout=30)
+    assert not closer.is_alive()
+    assert [block.data for block in blockchain.chain[1:]] == [{"Event": 0}, {"Event": 2}]
+    assert len(worker.errors) == 1 and len(failures) == 1
+    assert failures[0][0]["Event"] is worker.errors[0][1][0]["Event"]
@@ -0,0 +1,66 @@
+import threading
+
+from blockchain import Blockchain, valid_proof
+
+
+def test_parallel_and_serial_proof_of_work_agree():
+    # Proofs span several nonce chunks at 18 bits, so chunks come back out of order
+    serial = Blockchain(difficulty=18)
+    parallel = Blockchain(workers=3, difficulty=18)
+    try:
+        last_proof = 100
+        for _ in range(3):
+            proof = serial.proof_of_work(last_proof)
+            assert parallel.proof_of_work(last_proof) == proof
+            assert valid_proof(last_proof, proof, 18)
+            last_proof = proof
+    finally:
+        parallel.close()
+
+
+def test_proof_of_work_finds_the_smallest_proof():
+    blockchain = Blockchain(difficulty=8)
+    for last_proof in (1, 100, 12345):
+        proof = blockchain.proof_of_work(last_proof)
+        assert proof == next(nonce for nonce in range(proof + 1) if valid_proof(last_proof, nonce, 8))
+
+
+def test_cancelled_proof_of_work_returns_none():
+    cancel = threading.Event()
+    cancel.set()
+    blockchain = Blockchain(workers=2, difficulty=32)
+    try:
+        assert blockchain.proof_of_work(100, cancel) is None
+        assert Blockchain(difficulty=32).proof_of_work(100, cancel) is None
+    finally:
+        blockchain.close()
+
+
+def test_retarget_moves_difficulty_towards_the_target_time():
+    blockchain = Blockchain(difficulty=10, target_block_time=1.0, retarget_window=3)
+    blockchain.mining_times.extend([0.001, 0.001])
+    blockchain.retarget()
+    assert blockchain.difficulty == 10  # Window not full yet
+
+    blockchain.mining_times.append(0.001)
+    blockchain.retarget()
+    assert blockchain.difficulty == 12  # At most two bits per step
+    assert len(blockchain.mining_times) == 0
+
+    blockchain.mining_times.extend([1.9, 2.1, 2.0])  # Twice the target: one bit easier
+    blockchain.retarget()
+    assert blockchain.difficulty == 11
+
+    blockchain.mining_times.extend([1.1, 0.9, 1.0])
+    blockchain.retarget()
+    assert blockchain.difficulty == 11
+
+
+def test_blocks_record_the_difficulty_they_were_mined_at():
+    blockchain = Blockchain(difficulty=1, target_block_time=10, retarget_window=2)
+    for i in range(4):
+        blockchain.add_block({"Event": i}, blockchain.proof_of_work(blockchain.get_last_block().proof))
+    assert [block.difficulty for block in blockchain.chain[1:]] == [1, 1, 3, 3]
+    assert blockchain.difficulty == 5
+    for block, previous in zip(blockchain.chain[1:], blockchain.chain):
+        assert blockchain.is_valid_proof(previous.proof, block.proof, block.difficulty)
@@ -0,0 +1,85 @@
+import pytest
+
+from blockchain import Blockchain
+from chain_index import ChainIndex
+from chain_store import ChainStore
+from merkle import batch_data
+
+DIFFICULTY = 4
+
+
+def mine(blockchain, records):
+    for record in records:
+        blockchain.add_block(record, blockchain.proof_of_work(blockchain.get_last_block().proof))
+    return blockchain
+
+
+def rounds(count):
+    return [{"Player": f"p{i % 3}", "Outcome": "Win" if i % 2 else "Loss", "Spin Result": ["7", "7", "7"], "Amount": i}
+            for i in range(count)]
+
+
+def snapshot(index):
+    return index.count, list(index.timestamps), {field: {value: list(blocks) for value, blocks in values.items()}
+                                                 for field, values in index.postings.items()}
+
+
+def test_lookups_cover_single_and_batched_blocks():
+    index = ChainIndex()
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, chain_index=index),
+                      rounds(2) + [batch_data(rounds(4)), {"Player Hand": [10, 9], "Result": "Player Wins"}])
+    assert index.count == len(blockchain.chain) == 5
+    assert index.by_player("p0") == [1, 3]
+    assert index.by_player("p2") == [3]
+    assert index.by_outcome("Win") == [2, 3]
+    assert index.by_game("Slot Machine") == [1, 2, 3]
+    assert index.by_game("Blackjack") == [4]
+    between = (blockchain.chain[1].timestamp_ns + blockchain.chain[2].timestamp_ns) / 2e9
+    assert list(index.by_time(0, between)) == [0, 1]
+
+
+def test_range_scans_compare_ints_numerically():
+    index = ChainIndex()
+    mine(Blockchain(difficulty=DIFFICULTY, chain_index=index),
+         [{"Player": player} for player in (9, 10, 100, 2, "bob", "alice", 10)])
+    assert index.values("player") == [2, 9, 10, 100, "alice", "bob"]
+    assert index.values("player", 9, 99) == [9, 10]
+    assert index.values("player", low=10) == [10, 100, "alice", "bob"]
+    assert index.values("player", "alice", "b") == ["alice"]
+
+
+def test_index_catches_up_with_an_existing_store(tmp_path):
+    path = str(tmp_path / "chain")
+    mine(Blockchain(difficulty=DIFFICULTY, store=ChainStore(path)), rounds(3)).chain.close()
+
+    index = ChainIndex()
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=ChainStore(path), chain_index=index), rounds(1))
+    assert index.count == len(blockchain.chain) == 5
+    assert index.by_player("p0") == [1, 4]
+    assert snapshot(index) == snapshot(ChainIndex.build(blockchain.chain))
+    blockchain.chain.close()
+
+
+def test_add_block_checks_the_index_before_appending():
+    index = ChainIndex()
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, chain_index=index), rounds(2))
+    index.count += 1  # Out of step with the chain
+    with pytest.raises(ValueError):
+        mine(blockchain, rounds(1))
+    assert len(blockchain.chain) == 3
+
+
+def test_load_rebuilds_from_any_damaged_file(tmp_path):
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY), rounds(4))
+    path = str(tmp_path / "index.bin")
+    ChainIndex.build(blockchain.chain).save(path)
+    expected = snapshot(ChainIndex.build(blockchain.chain))
+    with open(path, "rb") as f:
+        data = f.read()
+    assert snapshot(ChainIndex.load(path, blockchain.chain)) == expected
+    for end in range(len(data)):
+        with open(path, "wb") as f:
+            f.write(data[:end])
+        loaded = ChainIndex.load(path, blockchain.chain)
+        assert snapshot(loaded) == expected
+        assert loaded.values("player") == ["p0", "p1", "p2"]
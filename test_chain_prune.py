@@ -0,0 +1,69 @@
+from blockchain import Blockchain
+from chain_index import ChainIndex
+from chain_prune import PrunedChain
+from merkle import batch_data
+from Racing_blockchain import race_state
+
+DIFFICULTY = 4
+
+
+def mine(blockchain, records):
+    for record in records:
+        blockchain.add_block(record, blockchain.proof_of_work(blockchain.get_last_block().proof))
+    return blockchain
+
+
+def rounds(count):
+    return [{"Player": f"p{i % 2}", "Outcome": "Win", "Spin Result": ["7", "7", "7"]} for i in range(count)]
+
+
+def test_memory_is_bounded_and_old_blocks_archived():
+    archive = []
+    chain = PrunedChain(keep_blocks=5, snapshot_every=4, archive=archive)
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=chain), rounds(12))
+    assert len(chain) == 13 and len(chain.blocks) == 5
+    assert [block.index for block in archive] == list(range(8))
+    assert chain.first_index == 0  # A list archive is readable
+    assert chain[3] is archive[3] and chain[-1] is blockchain.get_last_block()
+    assert [snapshot["Index"] for snapshot in chain.snapshots] == [3, 7, 11]
+
+
+def test_iteration_matches_indexing():
+    for archive in (None, []):
+        chain = PrunedChain(keep_blocks=5, archive=archive)
+        mine(Blockchain(difficulty=DIFFICULTY, store=chain), rounds(12))
+        assert [block.index for block in chain] == list(range(chain.first_index, len(chain)))
+        assert [block.index for block in chain] == [chain[i].index for i in range(chain.first_index, len(chain))]
+
+
+def test_chain_index_starts_at_first_index(tmp_path):
+    chain = PrunedChain(keep_blocks=5)
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=chain), rounds(12))
+    assert chain.first_index == 8
+
+    index = ChainIndex.build(chain)
+    assert (index.first, index.count) == (8, 13)
+    assert index.by_player("p0") == [9, 11]
+    assert list(index.by_time(0, chain[10].timestamp_ns / 1e9 + 1e-6)) == [8, 9, 10]
+
+    path = str(tmp_path / "index.bin")
+    index.save(path)
+    mine(blockchain, rounds(2))
+    loaded = ChainIndex.load(path, chain)
+    assert (loaded.first, loaded.count) == (8, 15)
+    assert loaded.by_player("p0") == [9, 11, 13]
+
+    # A Blockchain opened on a pruned chain indexes what it can still read
+    index = ChainIndex()
+    mine(Blockchain(difficulty=DIFFICULTY, store=chain, chain_index=index), rounds(1))
+    assert (index.first, index.count) == (10, 16)
+
+
+def test_race_snapshots_take_positions_from_their_tip():
+    # Blocks without a race step (genesis, the seed reveal) have no positions of their own
+    chain = PrunedChain(keep_blocks=10, snapshot_every=1, state=race_state)
+    steps = [{"Spin Result": [1, 2, 3], "Player Positions": [i, 2 * i, 3 * i]} for i in range(1, 4)]
+    reveal = {"Game": "Horse Race", "Reveal": "00"}
+    mine(Blockchain(difficulty=DIFFICULTY, store=chain), [steps[0], batch_data(steps[1:] + [reveal]), reveal])
+    assert [snapshot["State"] for snapshot in chain.snapshots] == [
+        None, {"Player Positions": [1, 2, 3]}, {"Player Positions": [3, 6, 9]}, None]
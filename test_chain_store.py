@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from blockchain import Blockchain
+from chain_store import ChainStore, encode_block
+from chain_verify import verify_chain
+
+DIFFICULTY = 4
+
+
+def mine(blockchain, count):
+    for i in range(count):
+        proof = blockchain.proof_of_work(blockchain.get_last_block().proof)
+        blockchain.add_block({"Player": f"p{i % 3}", "Amount": i, "Raw": bytes([i])}, proof)
+    return blockchain
+
+
+def test_blocks_survive_reopening_across_segments(tmp_path):
+    path = str(tmp_path / "chain")
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=ChainStore(path, segment_size=512)), 20)
+    expected = [(block.index, block.hash, block.previous_hash, block.timestamp_ns, block.proof, block.data)
+                for block in blockchain.chain]
+    blockchain.chain.close()
+    assert os.path.exists(os.path.join(path, "seg-000001.log"))
+
+    store = ChainStore(path, segment_size=512)
+    assert [(block.index, block.hash, block.previous_hash, block.timestamp_ns, block.proof, block.data)
+            for block in store] == expected
+    assert store[-1].index == len(expected) - 1
+    store.close()
+
+
+def test_chain_store_recovers_torn_tail(tmp_path):
+    path = str(tmp_path / "chain")
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=ChainStore(path)), 5)
+    hashes = [block.hash for block in blockchain.chain]
+    blockchain.chain.close()
+
+    # A crash while writing the next block leaves half a record after the checkpoint
+    segment = os.path.join(path, "seg-000000.log")
+    size = os.path.getsize(segment)
+    torn = encode_block(blockchain.chain[-1])
+    with open(segment, "ab") as f:
+        f.write(torn[:len(torn) // 2])
+
+    store = ChainStore(path)
+    assert os.path.getsize(segment) == size
+    assert [block.hash for block in store] == hashes
+    reopened = mine(Blockchain(difficulty=DIFFICULTY, store=store), 2)
+    assert len(reopened.chain) == len(hashes) + 2
+    assert verify_chain(reopened) is None
+    store.close()
+
+    store = ChainStore(path)
+    assert len(store) == len(hashes) + 2
+    assert [block.hash for block in store][:len(hashes)] == hashes
+    store.close()
+
+
+def test_read_only_store_never_writes(tmp_path):
+    path = str(tmp_path / "chain")
+    store = ChainStore(path)
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=store), 3)
+    hashes = [block.hash for block in blockchain.chain]
+    torn = encode_block(blockchain.get_last_block())
+    store.file.write(torn[:len(torn) // 2])  # A writer in the middle of appending a block
+    store.file.flush()
+    files = {name: open(os.path.join(path, name), "rb").read() for name in os.listdir(path)}
+
+    reader = ChainStore(path, read_only=True)
+    assert [block.hash for block in reader] == hashes
+    with pytest.raises(OSError):
+        reader.append(blockchain.get_last_block())
+    reader.close()
+    assert {name: open(os.path.join(path, name), "rb").read() for name in os.listdir(path)} == files
+    with pytest.raises(FileNotFoundError):
+        ChainStore(str(tmp_path / "missing"), read_only=True)
@@ -0,0 +1,80 @@
+import pytest
+
+import chain_verify
+from blockchain import Block, Blockchain
+from chain_store import ChainStore
+from chain_verify import CheckpointLog, verify_chain
+
+DIFFICULTY = 4
+
+
+def mine(blockchain, count):
+    for i in range(count):
+        proof = blockchain.proof_of_work(blockchain.get_last_block().proof)
+        blockchain.add_block({"Spin Result": ["Cherry", "Bar", "7"], "Balance After Spin": i}, proof)
+    return blockchain
+
+
+def test_verify_chain_detects_tampering():
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY), 6)
+    assert verify_chain(blockchain) is None
+
+    # Edited data no longer matches the block's hash
+    blockchain.chain[3].data = dict(blockchain.chain[3].data, Amount=500)
+    assert verify_chain(blockchain) == 3
+
+    # A re-hashed block breaks the link from the block after it
+    blockchain.chain[3].hash = blockchain.chain[3].hash_block()
+    assert verify_chain(blockchain) == 4
+
+
+def test_verify_chain_detects_bad_proof():
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY), 4)
+    block = blockchain.chain[2]
+    block.difficulty = 64
+    block.hash = block.hash_block()
+    blockchain.chain[3].previous_hash = block.raw_hash
+    blockchain.chain[3].hash = blockchain.chain[3].hash_block()
+    blockchain.chain[4].previous_hash = blockchain.chain[3].raw_hash
+    blockchain.chain[4].hash = blockchain.chain[4].hash_block()
+    assert verify_chain(blockchain) == 2
+
+
+@pytest.mark.parametrize("bad", [None, 1, 5, 6, 7, 18])
+def test_parallel_and_serial_verification_agree(monkeypatch, bad):
+    # Segments of 6 blocks, so the chain is split over several workers and bad blocks fall on
+    # segment boundaries as well as inside segments
+    monkeypatch.setattr(chain_verify, "SEGMENT_BLOCKS", 6)
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY), 20)
+    if bad is not None:
+        blockchain.chain[bad].data = {"Spin Result": ["7", "7", "7"], "Balance After Spin": 10 ** 6}
+    assert verify_chain(blockchain, workers=1) == bad
+    assert verify_chain(blockchain, workers=3) == bad
+
+
+def test_parallel_verification_of_a_store(monkeypatch, tmp_path):
+    # Workers open the store read-only themselves
+    monkeypatch.setattr(chain_verify, "SEGMENT_BLOCKS", 6)
+    store = ChainStore(str(tmp_path / "chain"))
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY, store=store), 20)
+    assert verify_chain(blockchain, workers=3) is None
+
+    last = blockchain.get_last_block()
+    store.append(Block(last.index + 1, last.raw_hash, None, {"Forged": True}, 0, DIFFICULTY, timestamp_ns=last.timestamp_ns))
+    assert verify_chain(blockchain, workers=1) == last.index + 1
+    assert verify_chain(blockchain, workers=3) == last.index + 1
+    store.close()
+
+
+def test_checkpoints_resume_after_the_last_verified_block(tmp_path):
+    checkpoints = CheckpointLog(str(tmp_path / "checkpoints"), b"key")
+    blockchain = mine(Blockchain(difficulty=DIFFICULTY), 5)
+    assert verify_chain(blockchain, checkpoints=checkpoints) is None
+    assert checkpoints.resume_index(blockchain.chain) == 6
+
+    # Blocks before the checkpoint are trusted; a forged signature is ignored
+    mine(blockchain, 3)
+    blockchain.chain[2].data = {"Edited": True}
+    assert verify_chain(blockchain, checkpoints=checkpoints) is None
+    assert verify_chain(blockchain) == 2
+    assert CheckpointLog(checkpoints.path, b"other key").resume_index(blockchain.chain) == 0
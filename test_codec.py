@@ -0,0 +1,47 @@
+import pytest
+
+import codec
+
+
+def test_codec_round_trip():
+    value = {
+        "Spin Result": ["Cherry", "Bar", "7"],
+        "Amount": -5,
+        "Big": 2 ** 200,
+        "Negative": -2 ** 70,
+        "Ratio": 0.25,
+        "Flags": [True, False, None],
+        "Raw": b"\x00\xff",
+        "Text": "café ♠",
+        "Nested": {"Events": [{"type": "Cat", "tier": 3}], "Empty": {}},
+    }
+    assert codec.decode(codec.encode(value)) == value
+    assert codec.decode(codec.encode((1, "a"))) == [1, "a"]
+
+
+def test_codec_canonical_ordering():
+    # Equal dicts encode to the same bytes whatever order their keys were inserted in
+    forward = {"a": 1, "b": {"x": [1, 2], "y": None}, "c": "z"}
+    backward = {"c": "z", "b": {"y": None, "x": [1, 2]}, "a": 1}
+    assert codec.encode(forward) == codec.encode(backward)
+    assert codec.encode({1: "int key", "1": "str key"}) == codec.encode({"1": "str key", 1: "int key"})
+
+
+def test_codec_rejects_bad_input():
+    with pytest.raises(ValueError):
+        codec.decode(codec.encode("x") + b"N")
+    with pytest.raises(ValueError):
+        codec.decode(b"?")
+    with pytest.raises(TypeError):
+        codec.encode({1, 2})
+
+
+def test_codec_rejects_every_truncation():
+    # Every cut point raises ValueError, including strings the decoder has already memoized
+    value = {"Spin Result": ["Cherry", "Bar", "7"], "Amount": -5, "Big": 2 ** 100, "Ratio": 0.5,
+             "Raw": b"xy", "Flags": [None, True, False], "Nested": [{"type": "Cat", "tier": 3}]}
+    data = codec.encode(value)
+    assert codec.decode(data) == value
+    for end in range(len(data)):
+        with pytest.raises(ValueError):
+            codec.decode(data[:end])
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import replay
+from blockchain import Blockchain
+from chain_store import ChainStore
+from game_server import SESSION_ID_LENGTH, GameServer
+from mempool import Mempool
+
+DIFFICULTY = 4
+
+
+async def play(server, game, ops):
+    await server.start()
+    port = server.server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    replies = []
+    for request in [{"op": "start", "game": game, "player": "alice"}] + [{"op": op} for op in ops]:
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        replies.append(json.loads(await reader.readline()))
+    writer.write(b'{"op": "quit"}\n')
+    await writer.drain()
+    await reader.read()  # The server ends the session and closes the connection
+    writer.close()
+    await server.stop()
+    return replies
+
+
+def run_server(path, ops):
+    # One server run on the store at path, with one session; returns the replies
+    store = ChainStore(path)
+    blockchain = Blockchain(difficulty=DIFFICULTY, store=store)
+    server = GameServer(blockchain, port=0, mempool=Mempool(blockchain, interval=0.05))
+    try:
+        return asyncio.run(play(server, "slot", ops))
+    finally:
+        store.close()
+
+
+def test_session_ids_stay_unique_across_runs_on_one_store(tmp_path):
+    path = str(tmp_path / "chain")
+    runs = [run_server(path, ["spin"] * 3) for _ in range(2)]
+    ids = [replies[0]["session"] for replies in runs]
+    assert ids[0] != ids[1]
+    for replies in runs:
+        assert all(reply["ok"] for reply in replies)
+        assert replies[0]["session"] == replies[0]["Seed Hash"][:SESSION_ID_LENGTH]
+
+    # Each run is its own session on the chain, and both replay cleanly
+    report = replay.replay_chain(path)
+    assert (report["sessions"], report["events"], report["mismatches"]) == (2, 6, [])
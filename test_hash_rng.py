@@ -0,0 +1,55 @@
+import hashlib
+
+from blockchain import Blockchain
+from hash_rng import GameSeed, HashRNG
+from Slot import SlotMachine
+
+
+def test_hash_rng_determinism():
+    first, second = HashRNG(b"seed", b"block"), HashRNG(b"seed", b"block")
+    assert [first.randbelow(1000) for _ in range(500)] == [second.randbelow(1000) for _ in range(500)]
+    assert first.choices(SlotMachine.REELS, 300) == second.choices(SlotMachine.REELS, 300)
+    deck_a, deck_b = list(range(52)), list(range(52))
+    first.shuffle(deck_a)
+    second.shuffle(deck_b)
+    assert deck_a == deck_b
+
+    # A different seed, block hash or reseed gives a different stream
+    draws = HashRNG(b"seed", b"block").indexes(14, 64)
+    assert HashRNG(b"other", b"block").indexes(14, 64) != draws
+    assert HashRNG(b"seed", b"other").indexes(14, 64) != draws
+    reseeded = HashRNG(b"seed", b"block")
+    reseeded.reseed(b"next")
+    assert reseeded.indexes(14, 64) != draws
+
+
+def test_hash_rng_bulk_matches_single_draws():
+    # Bulk draws consume the stream exactly like one draw at a time, so replay can mix them
+    bulk = HashRNG(b"seed", b"block")
+    single = HashRNG(b"seed", b"block")
+    assert list(bulk.indexes(14, 3000)) == [single.randbelow(14) for _ in range(3000)]
+    engine = SlotMachine(HashRNG(b"seed", b"block"))
+    assert SlotMachine(HashRNG(b"seed", b"block")).spins(50) == [engine.spin() for _ in range(50)]
+    assert all(0 <= value < 14 for value in bulk.indexes(14, 10000))
+
+
+def test_game_seed_commits_and_reseeds_on_sealed_blocks():
+    blockchain = Blockchain(difficulty=4)
+    seed = GameSeed(blockchain, "Slot Machine")
+    commitment, reveal = seed.commitment(), seed.reveal()
+    assert commitment["Seed Hash"] == hashlib.sha256(bytes.fromhex(reveal["Reveal"])).hexdigest()
+    assert commitment["Chain Tip"] == reveal["Chain Tip"] == blockchain.get_last_block().hash
+
+    # Nothing sealed yet: the stream is the one keyed by the seed and the tip
+    expected = HashRNG(seed.seed, seed.tip)
+    assert seed.begin_round() == {}
+    assert seed.rng.indexes(14, 30) == expected.indexes(14, 30)
+
+    blockchain.add_block(commitment, blockchain.proof_of_work(blockchain.get_last_block().proof))
+    block = blockchain.get_last_block()
+    seed.on_sealed(block, 0)
+    seed.on_sealed(blockchain.chain[0], 0)  # Older blocks never replace a newer one
+    assert seed.begin_round() == {"Reseed Block": block.index, "Reseed Hash": block.hash}
+    expected.reseed(block.raw_hash)
+    assert seed.rng.indexes(14, 30) == expected.indexes(14, 30)
+    assert seed.begin_round() == {}  # Each block is used once
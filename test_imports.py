@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import GAME_MODULES, HEAVY_MODULES, IMPORT_BUDGET
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(code):
+    # Output of `code` run in a fresh interpreter, so nothing imported here leaks in
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+
+
+@pytest.mark.parametrize("module", GAME_MODULES)
+def test_import_budget(module):
+    # Headless import: within budget and no GUI / network module loaded
+    output = run(f"import sys, time; start = time.perf_counter(); import {module}; "
+                 f"print(time.perf_counter() - start, [m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    elapsed, loaded = output.split(" ", 1)
+    assert loaded.strip() == "[]"
+    assert float(elapsed) < IMPORT_BUDGET
+
+
+def test_engines_play_headless():
+    # Every engine plays a round without loading tkinter or PIL
+    output = run(
+        "import sys\n"
+        "from hash_rng import HashRNG\n"
+        "from Slot import SlotMachine\n"
+        "from blackjack import BlackjackGame\n"
+        "from Racing_blockchain import HorseRace\n"
+        "from Russian_Roulette import RussianRoulette\n"
+        "from egg import EggGame\n"
+        "from blockchain import Blockchain\n"
+        "rng = HashRNG(b'seed')\n"
+        "SlotMachine(rng).autoplay(10, 100)\n"
+        "game = BlackjackGame(Blockchain(difficulty=4), rng)\n"
+        "game.new_game()\n"
+        "game.play_dealer()\n"
+        "game.check_winner()\n"
+        "HorseRace(rng).spin()\n"
+        "roulette = RussianRoulette(rng)\n"
+        "roulette.pull_trigger(roulette.gun1_chambers)\n"
+        "EggGame(Blockchain(difficulty=4), [].append, rng).break_egg()\n"
+        "print([m for m in ('tkinter', 'PIL') if m in sys.modules])\n")
+    assert output.strip() == "[]"
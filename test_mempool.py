@@ -0,0 +1,78 @@
+import pytest
+
+from blockchain import Blockchain
+from mempool import Mempool, RateLimitExceeded
+
+DIFFICULTY = 4
+
+
+def sealed(blockchain):
+    return [event for block in blockchain.chain[1:] for event in block.data["Events"]]
+
+
+def test_records_seal_in_submission_order_and_futures_resolve():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    mempool = Mempool(blockchain, interval=60, max_records=4)
+    futures = [mempool.submit({"Player": "p", "Event": i}) for i in range(6)]
+    mempool.close()
+    assert [future.result(timeout=5) for future in futures] == [(1, 0), (1, 1), (1, 2), (1, 3), (2, 0), (2, 1)]
+    assert sealed(blockchain) == [{"Player": "p", "Event": i} for i in range(6)]
+    with pytest.raises(RuntimeError):
+        mempool.submit({"Event": 6})
+
+
+def test_priority_ordering_seals_payouts_first():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    mempool = Mempool(blockchain, interval=60, ordering="priority")
+    for i, amount in enumerate([-1, 5, -1, 0, 2]):
+        mempool.submit({"Event": i, "Amount": amount})
+    mempool.close()
+    assert [event["Event"] for event in sealed(blockchain)] == [1, 4, 0, 2, 3]
+
+
+def test_equal_records_are_kept_unless_keyed():
+    # Two eggs of the same type and tier are two plays
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    mempool = Mempool(blockchain, interval=60)
+    egg = {"type": "Cat", "tier": 3}
+    first, second = mempool.submit(egg), mempool.submit(dict(egg))
+    keyed = mempool.submit({"Event": 1}, key="request-1")
+    assert mempool.submit({"Event": 2}, key="request-1") is keyed
+    mempool.close()
+    assert first.result(timeout=5) != second.result(timeout=5)
+    assert sealed(blockchain) == [egg, egg, {"Event": 1}]
+
+
+def test_dedup_keys_records_by_their_hash():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    mempool = Mempool(blockchain, interval=60, dedup=True)
+    first = mempool.submit({"Event": 1})
+    assert mempool.submit({"Event": 1}) is first
+    mempool.close()
+    assert sealed(blockchain) == [{"Event": 1}]
+
+
+def test_rate_limit_per_submitter():
+    mempool = Mempool(Blockchain(difficulty=DIFFICULTY), interval=60, rate=1, burst=3)
+    for i in range(3):
+        mempool.submit({"Event": i}, submitter="alice")
+    with pytest.raises(RateLimitExceeded):
+        mempool.submit({"Event": 3}, submitter="alice")
+    with pytest.raises(RateLimitExceeded):
+        mempool.admit("alice")
+    mempool.submit({"Event": 3}, submitter="bob")
+    mempool.submit({"Event": 4})  # No submitter, not limited
+    mempool.close()
+
+
+def test_failed_seal_fails_its_futures_and_forgets_their_keys():
+    class FailingChain(Blockchain):
+        def add_block(self, data, proof):
+            raise OSError("disk full")
+
+    mempool = Mempool(FailingChain(difficulty=DIFFICULTY), interval=0.05)
+    future = mempool.submit({"Event": 1}, key="request-1")
+    with pytest.raises(OSError):
+        future.result(timeout=5)
+    assert mempool.submit({"Event": 1}, key="request-1") is not future
+    mempool.close()
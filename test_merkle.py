@@ -0,0 +1,47 @@
+import pytest
+
+from blockchain import Blockchain
+from merkle import batch_data, event_proof, merkle_proof, merkle_root, verify_event
+
+
+def spins(count):
+    return [{"Spin Result": ["Cherry", "Bar", "7"], "Outcome": "Loss", "Amount": -5, "Balance After Spin": 100 - 5 * i}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("count", range(1, 12))
+def test_merkle_proofs(count):
+    events = spins(count)
+    root = merkle_root(events)
+    for position, event in enumerate(events):
+        proof = merkle_proof(events, position)
+        assert verify_event(event, position, proof, root)
+        assert not verify_event(dict(event, Amount=500), position, proof, root)
+        if count > 1:
+            assert not verify_event(event, (position + 1) % count, proof, root)
+
+
+def test_merkle_odd_node_is_promoted():
+    # Duplicating the last event must change the root, or the copy would verify too
+    events = spins(3)
+    assert merkle_root(events) != merkle_root(events + events[-1:])
+    assert None in merkle_proof(events, 2)
+    assert batch_data(events)["Merkle Root"] == merkle_root(events)
+
+
+def test_merkle_proof_position_out_of_range():
+    events = spins(3)
+    with pytest.raises(IndexError):
+        merkle_proof(events, 3)
+    with pytest.raises(IndexError):
+        merkle_proof(events, -1)
+
+
+def test_event_proof_from_batched_block():
+    # A sealed batch round-trips through the block's encoding and still proves every event
+    blockchain = Blockchain(difficulty=4)
+    events = spins(5)
+    blockchain.add_block(batch_data(events), blockchain.proof_of_work(blockchain.get_last_block().proof))
+    block = blockchain.get_last_block()
+    for position, event in enumerate(events):
+        assert verify_event(event, position, event_proof(block, position), block.data["Merkle Root"])
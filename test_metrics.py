@@ -0,0 +1,53 @@
+import threading
+
+import metrics
+
+
+def test_counter_value_counts_ticks_and_other_amounts():
+    counter = metrics.Counter("events")
+    for _ in range(5):
+        counter.tick()
+    counter.add(10)
+    counter.add()
+    assert counter.value == 16
+    assert counter.value == 16  # Reading does not count as a tick
+
+
+def test_counter_zero_keeps_bound_ticks_working():
+    counter = metrics.Counter("events")
+    tick = counter.tick
+    tick()
+    tick()
+    counter.zero()
+    assert counter.value == 0
+    tick()
+    counter.add(3)
+    assert counter.value == 4
+
+
+def test_counter_ticks_from_many_threads():
+    counter = metrics.Counter("events")
+
+    def work():
+        for _ in range(10000):
+            counter.tick()
+            counter.add(2)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(100):
+        counter.value  # Reads race with the ticks
+    for thread in threads:
+        thread.join()
+    assert counter.value == 4 * 10000 * 3
+
+
+def test_histogram_quantiles_within_a_bucket():
+    histogram = metrics.Histogram("stage")
+    for ns in range(1, 1001):
+        histogram.observe(ns * 1000)
+    assert histogram.count == 1000
+    assert histogram.max == 1000000
+    assert 500000 <= histogram.quantile(0.5) <= 500000 * 1.2
+    assert 990000 <= histogram.quantile(0.99) <= 1000000
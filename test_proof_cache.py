@@ -0,0 +1,48 @@
+from blockchain import Blockchain, valid_proof
+from proof_cache import RECORD, ProofCache
+
+
+def test_cached_proofs_are_shared_across_sessions(tmp_path):
+    path = str(tmp_path / "proofs.bin")
+    cache = ProofCache(path)
+    cache.prefill(5)
+    cache.close()
+
+    # A new session loads the file and mines nothing for the same proof sequence
+    cache = ProofCache(path)
+    assert len(cache) == 5
+    blockchain = Blockchain(cache=cache)
+    uncached = Blockchain()
+    last_proof = 100
+    for _ in range(5):
+        proof = cache.get(last_proof)
+        assert proof == blockchain.proof_of_work(last_proof) == uncached.proof_of_work(last_proof)
+        last_proof = proof
+    cache.close()
+
+
+def test_bad_and_torn_records_are_ignored(tmp_path):
+    path = tmp_path / "proofs.bin"
+    good = Blockchain().proof_of_work(100)
+    bad = next(proof for proof in range(10) if not valid_proof(7, proof))
+    path.write_bytes(RECORD.pack(100, good) + RECORD.pack(7, bad) + b"torn")
+    cache = ProofCache(str(path))
+    assert cache.get(100) == good
+    assert cache.get(7) is None
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_eviction_and_compaction_bound_the_file(tmp_path):
+    path = tmp_path / "proofs.bin"
+    cache = ProofCache(str(path), max_entries=2)
+    blockchain = Blockchain()
+    last_proof = 100
+    for _ in range(6):
+        proof = blockchain.proof_of_work(last_proof)
+        cache.put(last_proof, proof)
+        last_proof = proof
+    cache.close()
+    assert len(cache) == 2
+    assert path.stat().st_size <= 4 * RECORD.size
+    assert list(ProofCache(str(path), max_entries=2).entries.items()) == list(cache.entries.items())
@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+
+import replay
+from blockchain import Blockchain
+from chain_export import export_chain
+from chain_store import ChainStore
+from game_server import BlackjackSession, SlotSession
+from hash_rng import GameSeed
+from merkle import batch_data
+from Slot import SlotMachine
+
+DIFFICULTY = 4
+
+
+def mine(blockchain, records):
+    for record in records:
+        blockchain.add_block(record, blockchain.proof_of_work(blockchain.get_last_block().proof))
+    return blockchain
+
+
+def play_slot_gui(blockchain, spins=8):
+    # Records as SlotMachineGUI writes them: commitment, single spins (reseeding on sealed
+    # blocks), an autoplay run that stops early, then the reveal
+    seed = GameSeed(blockchain, "Slot Machine")
+    engine = SlotMachine(seed.rng)
+    mine(blockchain, [seed.commitment()])
+    balance = 100
+    for i in range(spins):
+        if i % 3 == 0:
+            seed.on_sealed(blockchain.get_last_block())
+        reseed = seed.begin_round()
+        ids = engine.spin_ids()
+        outcome, amount = engine.evaluate_ids(ids)
+        balance += amount
+        mine(blockchain, [{"Spin Result": engine.symbols(ids), "Outcome": outcome, "Amount": amount,
+                           "Balance After Spin": balance, **reseed}])
+    seed.on_sealed(blockchain.get_last_block())
+    reseed = seed.begin_round()
+    records, _ = engine.autoplay(20, balance, stop_loss=0, stop_win=1)
+    records[0].update(reseed, Autoplay=[20, len(records)])
+    mine(blockchain, [batch_data(records), seed.reveal()])
+
+
+def play_server(blockchain, session, ops):
+    # Records as GameServer.record tags them, sealed in one batch with the reveal
+    records = []
+    for op in ops:
+        if session.over:
+            break
+        for record in session.play(op, {})[1]:
+            records.append(dict(record, Player=session.player, Game=session.game, Session=session.id,
+                                Event=len(records) + 1))
+    records.append(dict(session.reveal(), Player=session.player, Game=session.game, Session=session.id,
+                        Event=len(records) + 1))
+    mine(blockchain, [batch_data(records)])
+
+
+def recorded_chain():
+    blockchain = Blockchain(difficulty=DIFFICULTY)
+    play_slot_gui(blockchain)
+    server = SimpleNamespace(blockchain=blockchain)
+    play_server(blockchain, SlotSession(server, "alice"), ["spin"] * 30)
+    play_server(blockchain, BlackjackSession(server, "bob"), ["deal", "stand"] * 5)
+    return blockchain
+
+
+def test_replay_checks_gui_and_server_sessions():
+    report = replay.replay_chain(recorded_chain().chain)
+    assert report["mismatches"] == []
+    assert report["sessions"] == 3
+    assert report["events"] > 8 + 5
+
+
+def test_replay_finds_edited_outcomes_and_draws():
+    blockchain = recorded_chain()
+    block = blockchain.chain[3]  # A single GUI spin
+    block.data = dict(block.data, Amount=block.data["Amount"] + 5)
+    batch = blockchain.chain[-2]  # The server slot session
+    events = [dict(event) for event in batch.data["Events"]]
+    spin = events[1]["Spin Result"]
+    events[1]["Spin Result"] = spin[::-1] if spin != spin[::-1] else ["Cherry", "Bar", "7"]
+    batch.data = batch_data(events)
+
+    fields = {(index, position, field) for index, position, field, _, _ in replay.replay_chain(blockchain.chain)["mismatches"]}
+    assert (3, 0, "Amount") in fields
+    assert (batch.index, 1, "Spin Result") in fields
+
+
+def test_replay_checks_reseeds_against_the_chain():
+    blockchain = recorded_chain()
+    block = next(block for block in blockchain.chain if isinstance(block.data, dict) and "Reseed Hash" in block.data)
+    block.data = dict(block.data, **{"Reseed Hash": blockchain.chain[0].hash})
+    fields = [field for _, _, field, _, _ in replay.replay_chain(blockchain.chain)["mismatches"]]
+    assert "Reseed Hash" in fields
+    assert "Spin Result" in fields  # The draws after the forged reseed no longer match
+
+
+def test_parallel_replay_matches_serial(tmp_path):
+    blockchain = recorded_chain()
+    blockchain.chain[5].data = dict(blockchain.chain[5].data, Outcome="Jackpot")
+    store = ChainStore(str(tmp_path / "chain"), fsync_every=0)
+    for block in blockchain.chain:
+        store.append(block)
+    store.close()
+    export = str(tmp_path / "chain.jsonl")
+    export_chain(blockchain.chain, export)
+
+    serial = replay.replay_chain(blockchain.chain)
+    assert [mismatch[:3] for mismatch in serial["mismatches"]] == [(5, 0, "Outcome")]
+    for source in (blockchain.chain, str(tmp_path / "chain"), export):
+        for workers in (1, 3):
+            report = replay.replay_chain(source, workers)
+            assert (report["sessions"], report["events"], report["mismatches"]) == \
+                (serial["sessions"], serial["events"], serial["mismatches"])
+
+
+def test_split_chain_covers_every_jsonl_line_once(tmp_path):
+    path = tmp_path / "chain.jsonl"
+    path.write_text("".join(f'{{"index": {i}, "hash": "{i:064x}", "data": {{"Spin Result": []}}}}\n'
+                            for i in range(1, 23)))
+    for workers in (1, 2, 5, 40):
+        hashes = {}
+        for source, first, stop in replay.split_chain(str(path), workers):
+            hashes.update(replay.decode_range(source, first, stop)[1])
+        assert sorted(hashes) == list(range(1, 23))
+
+
+def test_replay_reads_a_store_without_writing(tmp_path):
+    blockchain = recorded_chain()
+    path = tmp_path / "chain"
+    store = ChainStore(str(path))
+    for block in blockchain.chain:
+        store.append(block)
+    store.close()
+    with open(path / "seg-000000.log", "ab") as f:
+        f.write(b"torn")  # A server is still appending
+    before = {name.name: name.read_bytes() for name in path.iterdir()}
+
+    assert replay.replay_chain(str(path))["mismatches"] == []
+    assert {name.name: name.read_bytes() for name in path.iterdir()} == before
+    with pytest.raises(FileNotFoundError):
+        list(replay.load_records(str(tmp_path / "missing")))